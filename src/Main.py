@@ -1,60 +1,139 @@
+import time
+startup_time = time.perf_counter()
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, PhotoImage, ttk
-from PIL import Image, ImageTk
-import hashlib
+import functools
 import os
-import shutil
 import json
 
+import build_trace
 import cyber_elf_cost_editor
-import ips_patch_applier
+import file_copy
+import patch_conflicts
+import patch_library
+import patch_plan
+import patch_worker
+import preset_store
+import rom_builder
+import rom_scanner
+import rom_watcher
 import weapon_exp_editor
-
-EXPECTED_MD5 = {
-    'Zero 1': 'b24a17d080a01a404cbf018ba42b9803',
-    'Zero 2': '182363b0698322e1864ced6e9eed7ead',
-    'Zero 3': 'aa1d5eeffcd5e4577db9ee6d9b1100f9',
-    'Zero 4': '0d1e88bdb09ff68adf9877a121325f9c'
-}
-
-EXPECTED_SIZE = {
-    'Zero 1': 8388608,
-    'Zero 2': 8388608,
-    'Zero 3': 8388608,
-    'Zero 4': 16777216
-}
-
-ROM_HEADER_SIGNATURES = {
-    'Zero 1': b'MEGAMAN ZEROAZCE08',
-    'Zero 2': b'MEGAMANZERO2A62E08',
-    'Zero 3': b'MEGAMANZERO3BZ3E08',
-    'Zero 4': b'MEGAMANZERO4B4ZE08'
-}
+from rom_info import EXPECTED_MD5, get_rom_validation_error
 
 SETTINGS_FILE = "settings.json"
-DEFAULT_CONFIG_DIR = "default_configs"
+WORKER_POLL_INTERVAL_MS = 50
+STARTUP_BUDGET_MS = 300
+IMAGE_CACHE_SIZE = 16
+FOLDER_WATCH_INTERVAL_MS = 1000
 
 valid_rom_paths = {}
+folder_watcher = None
 
 def validate_roms_in_folder():
     folder = default_rom_folder.get()
     global valid_rom_paths
+    stop_folder_watch()
     if not os.path.isdir(folder):
         valid_rom_paths.clear()
         update_status_labels()
         return
 
-    valid_rom_paths.clear()
+    for status_label in status_labels.values():
+        status_label.config(text="Checking...", fg="orange")
+
+    def on_scan_done(scanned_rom_paths):
+        valid_rom_paths.clear()
+        valid_rom_paths.update(scanned_rom_paths)
+        update_status_labels()
+        start_folder_watch(folder)
+
+    def on_scan_error(e):
+        print(f"Failed to scan ROM folder: {e}")
+        valid_rom_paths.clear()
+        update_status_labels()
+
+    run_in_background(lambda progress: rom_scanner.scan_rom_folder(folder), on_scan_done, on_scan_error)
+
+def stop_folder_watch():
+    global folder_watcher
+    if folder_watcher:
+        folder_watcher.stop()
+        folder_watcher = None
+
+def start_folder_watch(folder):
+    global folder_watcher
+    stop_folder_watch()
+    try:
+        watcher = rom_watcher.watch_folder(folder)
+    except Exception as e:
+        print(f"Failed to watch ROM folder: {e}")
+        return
+    folder_watcher = watcher
+
+    def on_rescan_done(scanned_rom_paths):
+        if folder_watcher is watcher:
+            valid_rom_paths.clear()
+            valid_rom_paths.update(scanned_rom_paths)
+            update_status_labels()
+        root.after(FOLDER_WATCH_INTERVAL_MS, poll)
+
+    def on_rescan_error(e):
+        print(f"Failed to rescan ROM folder: {e}")
+        root.after(FOLDER_WATCH_INTERVAL_MS, poll)
 
-    for game_name in EXPECTED_MD5:
-        for file in os.listdir(folder):
-            if file.lower().endswith(".gba"):
-                full_path = os.path.join(folder, file)
-                if check_rom_validity(full_path, game_name, True):
-                    valid_rom_paths[game_name] = full_path
-                    break
+    def poll():
+        if folder_watcher is not watcher:
+            return
+        needs_full_scan, changed_paths = watcher.take_changes()
+        if needs_full_scan:
+            validate_roms_in_folder()
+        elif changed_paths:
+            run_in_background(lambda progress: rom_scanner.rescan_rom_files(folder, changed_paths),
+                              on_rescan_done, on_rescan_error)
+        else:
+            root.after(FOLDER_WATCH_INTERVAL_MS, poll)
+
+    root.after(FOLDER_WATCH_INTERVAL_MS, poll)
+
+def run_in_background(task, on_done, on_error, progress_title=None):
+    worker = patch_worker.PatchWorker(task)
+    progress_window = None
+
+    if progress_title:
+        progress_window = tk.Toplevel(root)
+        progress_window.title(progress_title)
+        progress_window.protocol("WM_DELETE_WINDOW", worker.cancel)
+        stage_label = tk.Label(progress_window, text="Starting...", width=40)
+        stage_label.pack(padx=10, pady=5)
+        progress_bar = ttk.Progressbar(progress_window, length=300, mode="determinate")
+        progress_bar.pack(padx=10, pady=5)
+        tk.Button(progress_window, text="Cancel", command=worker.cancel).pack(pady=5)
+        progress_window.grab_set()
+
+    def poll():
+        for event, value in worker.poll_events():
+            if event == "progress":
+                if progress_window:
+                    stage, done, total = value
+                    stage_label.config(text=stage)
+                    progress_bar.config(maximum=max(total, 1), value=done)
+                continue
+
+            if progress_window:
+                progress_window.destroy()
+            if event == "done":
+                on_done(value)
+            elif event == "error":
+                on_error(value)
+            elif event == "cancelled":
+                messagebox.showinfo("Cancelled", f"{progress_title} was cancelled.")
+            return
+        root.after(WORKER_POLL_INTERVAL_MS, poll)
 
-    update_status_labels()
+    worker.start()
+    root.after(WORKER_POLL_INTERVAL_MS, poll)
+    return worker
 
 def load_settings():
     if os.path.exists(SETTINGS_FILE):
@@ -78,53 +157,17 @@ def save_settings():
         print(f"Failed to save settings: {e}")
 
 
-def calculate_md5(file_path):
-    hash_md5 = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
-
-def read_gba_rom_header(file_path):
-    try:
-        with open(file_path, 'rb') as f:
-            f.seek(0xA0)
-            return f.read(0xB2 - 0xA0)
-    except Exception as e:
-        print(f"Failed to read ROM header: {e}")
-        return None
-
 def check_rom_validity(file_path, game_name, silent):
-    file_size = os.path.getsize(file_path)
-    expected_size = EXPECTED_SIZE.get(game_name)
+    error = get_rom_validation_error(file_path, game_name)
 
-    if file_size != expected_size:
+    if error:
         if not silent:
-            messagebox.showerror("Invalid ROM", f"Invalid file size for {game_name}. Expected size: {expected_size} bytes.")
-        return False
-
-    rom_header = read_gba_rom_header(file_path)
-    expected_rom_header = ROM_HEADER_SIGNATURES.get(game_name)
-
-    if rom_header != expected_rom_header:
-        if not silent:
-            messagebox.showerror("Invalid ROM", f"Invalid header for {game_name}. Expected header: {expected_rom_header}.")
-        return False
-
-    md5_hash = calculate_md5(file_path)
-    expected_md5 = EXPECTED_MD5.get(game_name)
-
-    if md5_hash != expected_md5:
-        if not silent:
-            messagebox.showerror("Invalid ROM", f"Invalid MD5 for {game_name}. Expected MD5 hash of: {expected_md5}.")
+            messagebox.showerror("Invalid ROM", error)
         return False
 
     return True
 
 
-def copy_file(file_path, save_path):
-    shutil.copy2(file_path, save_path)
-
 def ask_save_path_with_check(title, filetypes, default_ext):
     while True:
         save_path = filedialog.asksaveasfilename(
@@ -147,12 +190,11 @@ def open_file(game_name):
     if valid_path and os.path.isfile(valid_path):
         save_path = ask_save_path_with_check(
             title=f"Save Modified {game_name} ROM File",
-            filetypes=[("GBA Files", "*.gba")],
+            filetypes=[("GBA Files", "*.gba"), ("IPS Patch", "*.ips")],
             default_ext=".gba"
         )
         if not save_path:
             return
-        copy_file(valid_path, save_path)
         show_patch_options(game_name, valid_path, save_path)
         return
 
@@ -172,7 +214,8 @@ def open_file(game_name):
         standard_name = f"{game_name.replace(' ', '')}.gba"
         save_path_in_default = os.path.join(default_folder, standard_name)
         try:
-            shutil.copy2(file_path, save_path_in_default)
+            if not (os.path.exists(save_path_in_default) and os.path.samefile(file_path, save_path_in_default)):
+                file_copy.copy_file(file_path, save_path_in_default)
             valid_rom_paths[game_name] = save_path_in_default
             update_status_labels()
         except Exception as e:
@@ -180,17 +223,87 @@ def open_file(game_name):
 
     save_path = ask_save_path_with_check(
         title=f"Save Modified {game_name} ROM File",
-        filetypes=[("GBA Files", "*.gba")],
+        filetypes=[("GBA Files", "*.gba"), ("IPS Patch", "*.ips")],
         default_ext=".gba"
     )
 
     if not save_path:
         return
 
-    copy_file(file_path, save_path)
     show_patch_options(game_name, file_path, save_path)
 
 
+def open_patch_library():
+    game_paths = {
+        game_name: valid_rom_paths[game_name] for game_name in EXPECTED_MD5
+        if valid_rom_paths.get(game_name) and os.path.isfile(valid_rom_paths[game_name])
+    }
+    if not game_paths:
+        messagebox.showerror("No ROMs", "No valid ROMs were found in the default ROM folder.")
+        return
+
+    output_dir = filedialog.askdirectory(title="Save Patched ROMs To")
+    if not output_dir:
+        return
+
+    jobs = []
+    errors = {}
+    for game_name, rom_path in game_paths.items():
+        try:
+            jobs.append(patch_library.get_library_job(game_name, rom_path, output_dir))
+        except Exception as e:
+            errors[game_name] = e
+
+    library_window = tk.Toplevel(root)
+    library_window.title("Patching Library")
+    game_rows = {}
+    for row, game_name in enumerate(game_paths):
+        tk.Label(library_window, text=game_name).grid(row=row, column=0, sticky="w", padx=10, pady=5)
+        progress_bar = ttk.Progressbar(library_window, length=240, mode="determinate")
+        progress_bar.grid(row=row, column=1, padx=5, pady=5)
+        stage_label = tk.Label(library_window, text="Waiting...", width=40, anchor="w")
+        stage_label.grid(row=row, column=2, sticky="w", padx=10, pady=5)
+        game_rows[game_name] = (progress_bar, stage_label)
+    for game_name, e in errors.items():
+        game_rows[game_name][1].config(text=f"Failed: {e}")
+
+    if not jobs:
+        return
+
+    worker = patch_worker.PatchWorker(lambda progress: patch_library.build_library(jobs, progress))
+    cancel_button = tk.Button(library_window, text="Cancel", command=worker.cancel)
+    cancel_button.grid(row=len(game_paths), column=0, columnspan=3, pady=5)
+    library_window.protocol("WM_DELETE_WINDOW", worker.cancel)
+    library_window.grab_set()
+
+    def finish(text):
+        cancel_button.config(text="Close", command=library_window.destroy)
+        library_window.protocol("WM_DELETE_WINDOW", library_window.destroy)
+        messagebox.showinfo("Patch Library", text, parent=library_window)
+
+    def poll():
+        for event, value in worker.poll_events():
+            if event == "progress":
+                (game_name, stage), done, total = value
+                progress_bar, stage_label = game_rows[game_name]
+                stage_label.config(text=stage)
+                progress_bar.config(maximum=max(total, 1), value=done)
+                continue
+
+            if event == "done":
+                failed = len(errors) + sum(1 for _, error in value.values() if error)
+                finish(f"Patched {len(game_paths) - failed} of {len(game_paths)} games into {output_dir}.")
+            elif event == "error":
+                finish(f"Patching the library failed:\n{value}")
+            elif event == "cancelled":
+                finish("Patching the library was cancelled.")
+            return
+        root.after(WORKER_POLL_INTERVAL_MS, poll)
+
+    worker.start()
+    root.after(WORKER_POLL_INTERVAL_MS, poll)
+
+
 def show_patch_options(game_name, file_path, save_path):
     blood_restore = tk.BooleanVar()
     vocal_restore = tk.BooleanVar()
@@ -201,11 +314,13 @@ def show_patch_options(game_name, file_path, save_path):
     modify_weapon_exp = tk.BooleanVar()
     modify_cyber_elf_costs = tk.BooleanVar()
 
-    default_config_path = os.path.join(DEFAULT_CONFIG_DIR, f"default_config_{game_name.replace(' ', '')}.json")
-    if os.path.exists(default_config_path):
+    try:
+        config = preset_store.load_preset(game_name, "options")
+    except Exception as e:
+        config = None
+        print(f"Failed to load default config for {game_name}: {e}")
+    if config:
         try:
-            with open(default_config_path, 'r') as f:
-                config = json.load(f)
             options = config.get('options', {})
             blood_restore.set(options.get('blood_restore', False))
             vocal_restore.set(options.get('vocal_restore', False))
@@ -219,63 +334,59 @@ def show_patch_options(game_name, file_path, save_path):
             print(f"Failed to load default config for {game_name}: {e}")
 
 
+    def get_options():
+        return {
+            'blood_restore': blood_restore.get(),
+            'vocal_restore': vocal_restore.get(),
+            'ex_skill': ex_skill.get(),
+            'bn_viruses': bn_viruses.get(),
+            'retry_chips': retry_chips.get(),
+            'no_elf_penalty': no_elf_penalty.get(),
+            'modify_weapon_exp': modify_weapon_exp.get(),
+            'modify_cyber_elf_costs': modify_cyber_elf_costs.get()
+        }
+
     def apply_patches():
-        patch_list = []
-
-        if game_name == 'Zero 1':
-            if no_elf_penalty.get():
-                patch_list.append("patches/mmz1_mission_penalty.ips")
-            if retry_chips.get():
-                patch_list.append("patches/mmz1_9_retries.ips")
-            if blood_restore.get():
-                patch_list.append("patches/mmz1_blood.ips")
-
-        elif game_name == 'Zero 2':
-            if ex_skill.get():
-                patch_list.append("patches/mmz2_easyexskill.ips")
-            if no_elf_penalty.get():
-                patch_list.append("patches/mmz2_mission_penalty.ips")
-            if blood_restore.get():
-                patch_list.append("patches/mmz2_blood.ips")
-
-        elif game_name == 'Zero 3':
-            if ex_skill.get():
-                patch_list.append("patches/mmz3_easyexskill.ips")
-            if bn_viruses.get():
-                patch_list.append("patches/mmz3_exevirus.ips")
-            if blood_restore.get():
-                patch_list.append("patches/mmz3_blood.ips")
-
-        elif game_name == 'Zero 4':
-            if vocal_restore.get():
-                patch_list.append("patches/mmz4_vocals.ips")
-            if blood_restore.get():
-                patch_list.append("patches/mmz4_blood.ips")
-
-        ips_patch_applier.apply_ips_patches(file_path, save_path, patch_list)
+        patch_list = patch_plan.get_patch_list(game_name, get_options())
         patch_window.destroy()
 
+        weapon_exp_values = None
         if modify_weapon_exp.get():
-            weapon_exp_editor.open_weapon_exp_editor(save_path, game_name)
+            weapon_exp_values = weapon_exp_editor.open_weapon_exp_editor(file_path, game_name)
 
+        cyber_elf_values = None
         if modify_cyber_elf_costs.get():
-            cyber_elf_cost_editor.open_cyber_elf_cost_editor(save_path, game_name)
+            cyber_elf_values = cyber_elf_cost_editor.open_cyber_elf_cost_editor(file_path, game_name)
+
+        conflicts = patch_conflicts.find_conflicts(game_name, patch_list, bool(weapon_exp_values),
+                                                   bool(cyber_elf_values))
+        if conflicts:
+            messagebox.showerror("Conflicting Patches",
+                                 "The selected patches overwrite the same bytes:\n" +
+                                 patch_conflicts.format_conflicts(conflicts))
+            return
+
+        def build_task(progress):
+            with build_trace.trace_build(os.path.basename(save_path)):
+                if rom_builder.is_patch_output(save_path):
+                    rom_builder.build_ips_patch(file_path, save_path, game_name, EXPECTED_MD5[game_name], patch_list,
+                                                weapon_exp_values, cyber_elf_values, progress)
+                    return
+                rom_builder.build_rom(file_path, save_path, game_name, EXPECTED_MD5[game_name], patch_list,
+                                      weapon_exp_values, cyber_elf_values, progress)
+
+        def on_build_done(result):
+            messagebox.showinfo("Done", f"Patching for {game_name} is complete!")
 
-        messagebox.showinfo("Done", f"Patching for {game_name} is complete!")
+        def on_build_error(e):
+            messagebox.showerror("Error", f"Patching for {game_name} failed:\n{e}")
+
+        run_in_background(build_task, on_build_done, on_build_error, f"Patching {game_name}")
 
     def export_patch_config():
         config = {
             'game': game_name,
-            'options': {
-                'blood_restore': blood_restore.get(),
-                'vocal_restore': vocal_restore.get(),
-                'ex_skill': ex_skill.get(),
-                'bn_viruses': bn_viruses.get(),
-                'retry_chips': retry_chips.get(),
-                'no_elf_penalty': no_elf_penalty.get(),
-                'modify_weapon_exp': modify_weapon_exp.get(),
-                'modify_cyber_elf_costs': modify_cyber_elf_costs.get()
-            }
+            'options': get_options()
         }
         save_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")])
         if save_path:
@@ -286,24 +397,12 @@ def show_patch_options(game_name, file_path, save_path):
                 messagebox.showerror("Error", f"Could not export patch config:\n{e}")
 
     def save_as_default_config():
-        os.makedirs(DEFAULT_CONFIG_DIR, exist_ok=True)
-        default_path = os.path.join(DEFAULT_CONFIG_DIR, f"default_config_{game_name.replace(' ', '')}.json")
         config = {
             'game': game_name,
-            'options': {
-                'blood_restore': blood_restore.get(),
-                'vocal_restore': vocal_restore.get(),
-                'ex_skill': ex_skill.get(),
-                'bn_viruses': bn_viruses.get(),
-                'retry_chips': retry_chips.get(),
-                'no_elf_penalty': no_elf_penalty.get(),
-                'modify_weapon_exp': modify_weapon_exp.get(),
-                'modify_cyber_elf_costs': modify_cyber_elf_costs.get()
-            }
+            'options': get_options()
         }
         try:
-            with open(default_path, 'w') as f:
-                json.dump(config, f, indent=2)
+            preset_store.save_preset(game_name, "options", config)
             messagebox.showinfo("Saved", f"Default config saved for {game_name}.")
         except Exception as e:
             messagebox.showerror("Error", f"Could not save default config:\n{e}")
@@ -363,25 +462,8 @@ def show_patch_options(game_name, file_path, save_path):
     tk.Button(btn_frame, text="Apply Patches", command=apply_patches).pack(side="left", padx=5)
     patch_window.wait_window(patch_window)
 
-root = tk.Tk()
-root.title("Mega Man Zero Series Quality of Life Patcher")
-icon = PhotoImage(file='images/zero-icon.png')
-root.iconphoto(True, icon)
-
-box_art_region = tk.StringVar()
-box_art_region.set(load_settings().get("box_art_region", "US"))
-
-notebook = ttk.Notebook(root)
-notebook.pack(fill='both', expand=True)
-
-patcher_tab = tk.Frame(notebook)
-settings_tab = tk.Frame(notebook)
-notebook.add(patcher_tab, text='Patcher')
-notebook.add(settings_tab, text='Settings')
-
-
-def load_image(image_base):
-    region = box_art_region.get()
+@functools.lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def load_cached_image(image_base, region):
     if region == "Japan":
         suffix = "_jpn"
     elif region == "Europe":
@@ -390,13 +472,18 @@ def load_image(image_base):
         suffix = ""
     image_path = f"images/{image_base}{suffix}.png"
     try:
-        img = Image.open(image_path)
-        return ImageTk.PhotoImage(img)
+        return PhotoImage(file=image_path)
+    except tk.TclError:
+        pass
+    try:
+        from PIL import Image, ImageTk
+        return ImageTk.PhotoImage(Image.open(image_path))
     except Exception as e:
         print(f"Error loading image {image_path}: {e}")
         return None
 
-
+def load_image(image_base):
+    return load_cached_image(image_base, box_art_region.get())
 
 def load_game_buttons():
     for widget in patcher_tab.winfo_children():
@@ -411,6 +498,7 @@ def load_game_buttons():
     tk.Button(patcher_tab, image=zero2_img, command=lambda: open_file('Zero 2')).grid(row=0, column=1, padx=10, pady=10)
     tk.Button(patcher_tab, image=zero3_img, command=lambda: open_file('Zero 3')).grid(row=1, column=0, padx=10, pady=10)
     tk.Button(patcher_tab, image=zero4_img, command=lambda: open_file('Zero 4')).grid(row=1, column=1, padx=10, pady=10)
+    tk.Button(patcher_tab, text="Patch Library", command=open_patch_library).grid(row=2, column=0, columnspan=2, pady=5)
 
     patcher_tab.zero1_img = zero1_img
     patcher_tab.zero2_img = zero2_img
@@ -432,66 +520,24 @@ def update_status_labels():
         else:
             status_label.config(text="Missing/Invalid", fg="red")
 
-
-tk.Label(settings_tab, text="Box Art Region:").pack(pady=10)
-region_dropdown = ttk.Combobox(settings_tab, textvariable=box_art_region, values=["USA", "Japan", "Europe"], state="readonly")
-region_dropdown.pack()
-
 def update_window_title():
     if box_art_region.get() == "Japan":
         root.title("Rockman Zero Series Quality of Life Patcher")
     else:
         root.title("Mega Man Zero Series Quality of Life Patcher")
 
-
 def on_region_change(event=None):
     save_settings()
     load_game_buttons()
     update_window_title()
 
-
-region_dropdown.bind("<<ComboboxSelected>>", on_region_change)
-
-default_rom_folder = tk.StringVar()
-default_rom_folder.set(load_settings().get("default_rom_folder", ""))
-
-tk.Label(settings_tab, text="Default ROM Folder:").pack(pady=10)
-rom_folder_entry = ttk.Entry(settings_tab, textvariable=default_rom_folder, width=40, state="readonly")
-rom_folder_entry.pack()
-tk.Button(settings_tab, text="Browse", command=choose_default_rom_folder).pack(pady=5)
-
-status_labels = {}
-
-status_frame = tk.Frame(settings_tab)
-status_frame.pack(pady=10, fill="x")
-
-tk.Label(status_frame, text="ROM Validation Status:").pack(anchor="w")
-
-for game in EXPECTED_MD5:
-    frame = tk.Frame(status_frame)
-    frame.pack(anchor="w", pady=2, fill="x")
-
-    tk.Label(frame, text=game + ":").pack(side="left", padx=5)
-    label = tk.Label(frame, text="Unknown", fg="orange")
-    label.pack(side="left")
-    status_labels[game] = label
-
-refresh_btn = tk.Button(status_frame, text="Refresh ROM Status", command=validate_roms_in_folder)
-refresh_btn.pack(pady=5, anchor="w")
-
-
 def delete_default_configs():
-    if not os.path.exists(DEFAULT_CONFIG_DIR):
-        messagebox.showinfo("No Defaults", "There are no default configs to delete.")
-        return
-
     confirm = messagebox.askyesno("Confirm Reset", "Are you sure you want to delete all saved default configs?")
     if confirm:
         try:
-            for filename in os.listdir(DEFAULT_CONFIG_DIR):
-                file_path = os.path.join(DEFAULT_CONFIG_DIR, filename)
-                if os.path.isfile(file_path):
-                    os.remove(file_path)
+            if not preset_store.delete_presets(preset_store.DEFAULT_PRESET_NAME):
+                messagebox.showinfo("No Defaults", "There are no default configs to delete.")
+                return
             messagebox.showinfo("Defaults Reset", "All default config files have been deleted.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete default config files:\n{e}")
@@ -527,12 +573,73 @@ def reset_settings_to_default():
     load_game_buttons()
     messagebox.showinfo("Reset", "Settings have been reset to default values.")
 
+def on_first_window():
+    elapsed_ms = (time.perf_counter() - startup_time) * 1000
+    if elapsed_ms > STARTUP_BUDGET_MS:
+        print(f"Startup took {elapsed_ms:.0f} ms, over the {STARTUP_BUDGET_MS} ms budget")
+    validate_roms_in_folder()
+
+def main():
+    global root, box_art_region, patcher_tab, region_dropdown, default_rom_folder, rom_folder_entry, status_labels
+
+    root = tk.Tk()
+    root.title("Mega Man Zero Series Quality of Life Patcher")
+    icon = PhotoImage(file='images/zero-icon.png')
+    root.iconphoto(True, icon)
+
+    settings = load_settings()
+
+    box_art_region = tk.StringVar()
+    box_art_region.set(settings.get("box_art_region", "US"))
+
+    notebook = ttk.Notebook(root)
+    notebook.pack(fill='both', expand=True)
+
+    patcher_tab = tk.Frame(notebook)
+    settings_tab = tk.Frame(notebook)
+    notebook.add(patcher_tab, text='Patcher')
+    notebook.add(settings_tab, text='Settings')
 
-tk.Button(settings_tab, text="Delete Default Configs", command=delete_default_configs).pack(side="left", padx=5, pady=5)
-reset_btn = tk.Button(settings_tab, text="Reset Settings to Default", command=reset_settings_to_default)
-reset_btn.pack(side="left", padx=5, pady=5)
+    tk.Label(settings_tab, text="Box Art Region:").pack(pady=10)
+    region_dropdown = ttk.Combobox(settings_tab, textvariable=box_art_region, values=["USA", "Japan", "Europe"], state="readonly")
+    region_dropdown.pack()
+    region_dropdown.bind("<<ComboboxSelected>>", on_region_change)
+
+    default_rom_folder = tk.StringVar()
+    default_rom_folder.set(settings.get("default_rom_folder", ""))
+
+    tk.Label(settings_tab, text="Default ROM Folder:").pack(pady=10)
+    rom_folder_entry = ttk.Entry(settings_tab, textvariable=default_rom_folder, width=40, state="readonly")
+    rom_folder_entry.pack()
+    tk.Button(settings_tab, text="Browse", command=choose_default_rom_folder).pack(pady=5)
+
+    status_labels = {}
+
+    status_frame = tk.Frame(settings_tab)
+    status_frame.pack(pady=10, fill="x")
+
+    tk.Label(status_frame, text="ROM Validation Status:").pack(anchor="w")
+
+    for game in EXPECTED_MD5:
+        frame = tk.Frame(status_frame)
+        frame.pack(anchor="w", pady=2, fill="x")
+
+        tk.Label(frame, text=game + ":").pack(side="left", padx=5)
+        label = tk.Label(frame, text="Unknown", fg="orange")
+        label.pack(side="left")
+        status_labels[game] = label
+
+    refresh_btn = tk.Button(status_frame, text="Refresh ROM Status", command=validate_roms_in_folder)
+    refresh_btn.pack(pady=5, anchor="w")
+
+    tk.Button(settings_tab, text="Delete Default Configs", command=delete_default_configs).pack(side="left", padx=5, pady=5)
+    reset_btn = tk.Button(settings_tab, text="Reset Settings to Default", command=reset_settings_to_default)
+    reset_btn.pack(side="left", padx=5, pady=5)
+
+    load_game_buttons()
+    update_window_title()
+    root.after_idle(lambda: root.after(0, on_first_window))
+    root.mainloop()
 
-load_game_buttons()
-validate_roms_in_folder()
-update_window_title()
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import game_tables
+import ips_patch_applier
+import output_cache
+import output_manifest
+import patch_conflicts
+import patch_plan
+import rom_builder
+import rom_fingerprint
+import rom_scanner
+from rom_info import EXPECTED_MD5, EXPECTED_SIZE, ROM_HEADER_END, ROM_HEADER_SIGNATURES, ROM_HEADER_START
+
+MIB = 1024 * 1024
+ROM_SIZES = (8 * MIB, 16 * MIB)
+DEFAULT_THRESHOLD = 0.25
+TABLE_CALLS = 200
+DEFAULT_MEMORY_CAP = MIB
+
+def legacy_calculate_md5(file_path):
+    hash_md5 = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+def time_call(func, *args, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def trace_call(func, *args):
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    finally:
+        tracemalloc.stop()
+    return peak, blocks
+
+def get_peak_rss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def measure(name, size, func, *args, repeat=5):
+    elapsed = time_call(func, *args, repeat=repeat)
+    peak_alloc, blocks = trace_call(func, *args)
+    return {
+        "name": name,
+        "size": size,
+        "seconds": elapsed,
+        "peak_alloc": peak_alloc,
+        "blocks": blocks,
+        "peak_rss": get_peak_rss()
+    }
+
+def make_synthetic_rom(rom_path, size, game_name=None, seed=0):
+    rom = bytearray(random.Random(seed).randbytes(size))
+    if game_name:
+        rom[ROM_HEADER_START:ROM_HEADER_END] = ROM_HEADER_SIGNATURES[game_name]
+    with open(rom_path, "wb") as f:
+        f.write(rom)
+    return rom_path
+
+def make_synthetic_ips(patch_path, rom_size, record_count, record_size, rle_every=4, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(record_count):
+        offset = rng.randrange(0, rom_size - record_size)
+        if offset == ips_patch_applier.IPS_EOF_OFFSET:
+            offset += 1
+        if rle_every and i % rle_every == 0:
+            records.append((offset, rng.randbytes(1), record_size))
+        else:
+            records.append((offset, rng.randbytes(record_size), -1))
+    with open(patch_path, "wb") as f:
+        f.write(ips_patch_applier.write_ips_records(records))
+    return patch_path
+
+def bench_fingerprint(temp_dir, sizes=ROM_SIZES, repeat=5):
+    results = []
+    for size in sizes:
+        rom_path = make_synthetic_rom(os.path.join(temp_dir, f"rom_{size}.gba"), size, seed=size)
+        for name, func in [
+            ("legacy_md5", legacy_calculate_md5),
+            ("md5", rom_fingerprint.calculate_md5),
+            ("fingerprint", rom_fingerprint.calculate_fingerprint),
+        ]:
+            results.append(measure(f"{name}_{size // MIB}m", size, func, rom_path, repeat=repeat))
+    return results
+
+def bench_apply_patches(temp_dir, record_count, record_size, sizes=ROM_SIZES, repeat=5):
+    results = []
+    for size in sizes:
+        rom_path = make_synthetic_rom(os.path.join(temp_dir, f"patch_src_{size}.gba"), size, seed=size)
+        patch_path = make_synthetic_ips(os.path.join(temp_dir, f"synthetic_{size}.ips"), size, record_count,
+                                        record_size, seed=size)
+        save_path = os.path.join(temp_dir, f"patched_{size}.gba")
+        results.append(measure(f"apply_ips_patches_{size // MIB}m", size, ips_patch_applier.apply_ips_patches,
+                               rom_path, save_path, [patch_path], repeat=repeat))
+    return results
+
+@contextmanager
+def fresh_build_state(work_dir):
+    saved = (patch_plan.PATCH_PLAN_CACHE_DIR, output_cache.OUTPUT_CACHE_DIR, output_manifest.OUTPUT_MANIFEST_FILE)
+    os.makedirs(work_dir)
+    patch_plan.PATCH_PLAN_CACHE_DIR = os.path.join(work_dir, "patch_plans")
+    output_cache.OUTPUT_CACHE_DIR = os.path.join(work_dir, "output_cache")
+    output_manifest.OUTPUT_MANIFEST_FILE = os.path.join(work_dir, "output_manifest.json")
+    patch_plan._patch_indexes.clear()
+    patch_conflicts._patch_ranges.clear()
+    patch_conflicts._conflict_indexes.clear()
+    try:
+        yield
+    finally:
+        patch_plan.PATCH_PLAN_CACHE_DIR, output_cache.OUTPUT_CACHE_DIR, output_manifest.OUTPUT_MANIFEST_FILE = saved
+        patch_plan._patch_indexes.clear()
+        patch_conflicts._patch_ranges.clear()
+        patch_conflicts._conflict_indexes.clear()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+@contextmanager
+def memory_cap_env(memory_cap):
+    saved = os.environ.get(rom_builder.MEMORY_CAP_ENV)
+    if memory_cap:
+        os.environ[rom_builder.MEMORY_CAP_ENV] = str(memory_cap)
+    else:
+        os.environ.pop(rom_builder.MEMORY_CAP_ENV, None)
+    try:
+        yield
+    finally:
+        if saved is None:
+            os.environ.pop(rom_builder.MEMORY_CAP_ENV, None)
+        else:
+            os.environ[rom_builder.MEMORY_CAP_ENV] = saved
+
+def build_cold(temp_dir, rom_path, save_path, game_name, patch_list, cyber_elf_values, memory_cap):
+    with memory_cap_env(memory_cap), fresh_build_state(os.path.join(temp_dir, "build_state")):
+        rom_builder.build_rom(rom_path, save_path, game_name, EXPECTED_MD5[game_name], patch_list,
+                              cyber_elf_values=cyber_elf_values)
+
+def bench_streaming(temp_dir, memory_cap, repeat=5):
+    results = []
+    for game_name, patches in patch_plan.GAME_PATCHES.items():
+        size = EXPECTED_SIZE[game_name]
+        label = game_name.replace(' ', '').lower()
+        rom_path = make_synthetic_rom(os.path.join(temp_dir, f"stream_{label}.gba"), size, game_name)
+        patch_list = [f"{patch_plan.PATCH_DIR}/{patch_file}" for _, patch_file in patches]
+        cyber_elf_values = game_tables.read_cyber_elf_cost_values(rom_path, game_name)
+
+        for tables in (None, cyber_elf_values):
+            name = f"build_{label}_tables" if tables else f"build_{label}"
+            save_path = os.path.join(temp_dir, f"{name}.gba")
+            expected_path = os.path.join(temp_dir, f"{name}_expected.gba")
+            build_cold(temp_dir, rom_path, expected_path, game_name, patch_list, tables, None)
+            build_cold(temp_dir, rom_path, save_path, game_name, patch_list, tables, memory_cap)
+            if rom_fingerprint.calculate_md5(save_path) != rom_fingerprint.calculate_md5(expected_path):
+                raise ValueError(f"Streaming build of {game_name} did not match the in-memory result")
+
+            result = measure(name, size, build_cold, temp_dir, rom_path, save_path, game_name, patch_list, tables,
+                             memory_cap, repeat=repeat)
+            result["memory_cap"] = memory_cap
+            results.append(result)
+    return results
+
+def check_memory_caps(results):
+    over_cap = [result for result in results if "memory_cap" in result and result["peak_alloc"] > result["memory_cap"]]
+    for result in over_cap:
+        print(f"Over memory cap: {result['name']} allocated {result['peak_alloc']} bytes, "
+              f"cap {result['memory_cap']} bytes")
+    return over_cap
+
+def bench_scan_folder(temp_dir, file_count, repeat=5):
+    folder = os.path.join(temp_dir, "scan")
+    os.makedirs(folder, exist_ok=True)
+    games = list(EXPECTED_SIZE)
+    total_size = 0
+    for i in range(file_count):
+        game_name = games[i % len(games)]
+        make_synthetic_rom(os.path.join(folder, f"rom_{i:03d}.gba"), EXPECTED_SIZE[game_name], game_name, seed=i)
+        total_size += EXPECTED_SIZE[game_name]
+
+    def cold_scan():
+        if os.path.exists(rom_scanner.ROM_INDEX_FILE):
+            os.remove(rom_scanner.ROM_INDEX_FILE)
+        rom_scanner.scan_rom_folder(folder)
+
+    cwd = os.getcwd()
+    os.chdir(temp_dir)
+    try:
+        results = [measure(f"scan_cold_{file_count}", total_size, cold_scan, repeat=repeat)]
+        rom_scanner.scan_rom_folder(folder)
+        results.append(measure(f"scan_warm_{file_count}", total_size, rom_scanner.scan_rom_folder, folder,
+                               repeat=repeat))
+    finally:
+        os.chdir(cwd)
+    return results
+
+def bench_tables(temp_dir, repeat=5):
+    results = []
+    for game_name in EXPECTED_SIZE:
+        rom_path = make_synthetic_rom(os.path.join(temp_dir, f"table_{game_name.replace(' ', '')}.gba"),
+                                      EXPECTED_SIZE[game_name], game_name)
+        tables = [(
+            "cyber_elf", game_tables.read_cyber_elf_cost_values, game_tables.write_cyber_elf_cost_values,
+            game_tables.get_cyber_elf_cost_schema(game_name).size
+        )]
+        if game_name in game_tables.weapon_offsets:
+            tables.append((
+                "weapon_exp", game_tables.read_weapon_exp_values, game_tables.write_weapon_exp_values,
+                sum(schema.size for schema in game_tables.get_weapon_exp_schemas(game_name).values())
+            ))
+
+        for table_name, read, write, table_size in tables:
+            values = read(rom_path, game_name)
+            if isinstance(values, dict):
+                values = {weapon: sorted(max(1, val) for val in levels) for weapon, levels in values.items()}
+
+            def read_many():
+                for _ in range(TABLE_CALLS):
+                    read(rom_path, game_name)
+
+            def write_many():
+                for _ in range(TABLE_CALLS):
+                    write(rom_path, game_name, values)
+
+            label = f"{table_name}_{game_name.replace(' ', '').lower()}"
+            results.append(measure(f"read_{label}", table_size * TABLE_CALLS, read_many, repeat=repeat))
+            results.append(measure(f"write_{label}", table_size * TABLE_CALLS, write_many, repeat=repeat))
+    return results
+
+def run_benchmarks(repeat=5, record_count=2000, record_size=64, file_count=8, memory_cap=DEFAULT_MEMORY_CAP):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        results = bench_fingerprint(temp_dir, repeat=repeat)
+        results += bench_apply_patches(temp_dir, record_count, record_size, repeat=repeat)
+        results += bench_streaming(temp_dir, memory_cap, repeat=repeat)
+        results += bench_scan_folder(temp_dir, file_count, repeat=repeat)
+        results += bench_tables(temp_dir, repeat=repeat)
+    return results
+
+def print_results(results):
+    print(f"{'benchmark':<28} {'time':>11} {'MiB/s':>9} {'alloc peak':>11} {'blocks':>8} {'peak RSS':>9}")
+    for result in results:
+        mib = result["size"] / MIB
+        elapsed = result["seconds"]
+        print(f"{result['name']:<28} {elapsed * 1000:8.2f} ms {mib / elapsed:9.1f} "
+              f"{result['peak_alloc'] / MIB:7.1f} MiB {result['blocks']:8d} {result['peak_rss'] / MIB:5.0f} MiB")
+
+def save_baseline(results, baseline_path):
+    with open(baseline_path, 'w') as f:
+        json.dump({result["name"]: result["seconds"] for result in results}, f, indent=2)
+
+def check_baseline(results, baseline_path, threshold):
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for result in results:
+        expected = baseline.get(result["name"])
+        if expected and result["seconds"] > expected * (1 + threshold):
+            regressions.append((result["name"], expected, result["seconds"]))
+
+    for name, expected, elapsed in regressions:
+        print(f"Regression: {name} took {elapsed * 1000:.2f} ms, baseline {expected * 1000:.2f} ms")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ROM hashing, patching, streaming, scanning and table access")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--records", type=int, default=2000, help="Records per synthetic IPS patch")
+    parser.add_argument("--record-size", type=int, default=64, help="Bytes per synthetic IPS record")
+    parser.add_argument("--files", type=int, default=8, help="Synthetic ROMs in the scanned folder")
+    parser.add_argument("--memory-cap", type=rom_builder.parse_memory_cap, default=DEFAULT_MEMORY_CAP,
+                        help="Peak allocation allowed while building with the bundled patches (e.g. 256K)")
+    parser.add_argument("--save-baseline", help="Write the timings to this JSON file")
+    parser.add_argument("--baseline", help="Compare the timings against this JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown over the baseline before failing (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat, args.records, args.record_size, args.files, args.memory_cap)
+    print_results(results)
+
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+    failed = bool(check_memory_caps(results))
+    if args.baseline and check_baseline(results, args.baseline, args.threshold):
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
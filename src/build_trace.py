@@ -0,0 +1,107 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+BUILD_TRACE_ENV = "MMZ_PATCHER_TRACE"
+TRACE_SUMMARY_FILE = "summary.json"
+
+_local = threading.local()
+
+class BuildTrace:
+    def __init__(self, name):
+        self.name = name
+        self.events = []
+        self.start = time.perf_counter()
+
+    def add_span(self, name, start, end, args):
+        self.events.append({
+            "name": name,
+            "cat": "build",
+            "ph": "X",
+            "ts": (start - self.start) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args
+        })
+
+    def get_summary(self):
+        return summarize_events(self.events)
+
+    def write(self, trace_dir):
+        os.makedirs(trace_dir, exist_ok=True)
+        file_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', self.name)
+        trace_path = os.path.join(trace_dir, f"{file_name}-{os.getpid()}-{time.time_ns()}.json")
+        with open(trace_path, 'w') as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+        return trace_path
+
+def get_trace_dir():
+    return os.environ.get(BUILD_TRACE_ENV) or None
+
+def get_current_trace():
+    return getattr(_local, "trace", None)
+
+@contextmanager
+def trace_build(name):
+    trace_dir = get_trace_dir()
+    if trace_dir is None or get_current_trace() is not None:
+        yield get_current_trace()
+        return
+
+    trace = BuildTrace(name)
+    _local.trace = trace
+    try:
+        with span("Build", output=name):
+            yield trace
+    finally:
+        _local.trace = None
+        try:
+            trace.write(trace_dir)
+        except Exception as e:
+            print(f"Failed to write build trace: {e}")
+
+@contextmanager
+def span(name, **args):
+    trace = get_current_trace()
+    start = time.perf_counter()
+    try:
+        yield args
+    finally:
+        if trace is not None:
+            trace.add_span(name, start, time.perf_counter(), args)
+
+def summarize_events(events):
+    summary = {}
+    for event in events:
+        totals = summary.setdefault(event["name"], {"count": 0, "seconds": 0.0})
+        totals["count"] += 1
+        totals["seconds"] += event["dur"] / 1e6
+        for key, value in event["args"].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                totals[key] = totals.get(key, 0) + value
+    return summary
+
+def merge_summaries(summaries):
+    merged = {}
+    for summary in summaries:
+        for name, totals in summary.items():
+            merged_totals = merged.setdefault(name, {})
+            for key, value in totals.items():
+                merged_totals[key] = merged_totals.get(key, 0) + value
+    return merged
+
+def print_summary(summary):
+    print(f"{'span':<28} {'count':>6} {'total':>11} {'mean':>11}  counters")
+    for name, totals in sorted(summary.items(), key=lambda item: -item[1]["seconds"]):
+        counters = ", ".join(f"{key}={value}" for key, value in totals.items() if key not in ("count", "seconds"))
+        print(f"{name:<28} {totals['count']:6d} {totals['seconds'] * 1000:8.1f} ms "
+              f"{totals['seconds'] * 1000 / totals['count']:8.2f} ms  {counters}")
+
+def write_summary(summary, trace_dir):
+    os.makedirs(trace_dir, exist_ok=True)
+    with open(os.path.join(trace_dir, TRACE_SUMMARY_FILE), 'w') as f:
+        json.dump(summary, f, indent=2)
@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import build_trace
+import game_tables
+import output_cache
+import patch_conflicts
+import patch_plan
+import preset_store
+import rom_builder
+import size_units
+import undo_journal
+from rom_info import EXPECTED_MD5, get_rom_validation_error
+
+JOB_PATH_KEYS = ("rom", "config", "weapon_exp_config", "cyber_elf_config", "output")
+
+def parse_size(value):
+    try:
+        return size_units.parse_size(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_memory_cap(value):
+    try:
+        return rom_builder.parse_memory_cap(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def load_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def load_table_config(path, game_name):
+    data = load_json(path)
+    if data.get("game") != game_name:
+        raise ValueError(f"Config {path} is for {data.get('game')}, not {game_name}.")
+    return data.get("values")
+
+def load_weapon_exp_config(path, rom_path, game_name):
+    return game_tables.merge_weapon_exp_values(load_table_config(path, game_name), rom_path, game_name)
+
+def load_cyber_elf_config(path, rom_path, game_name):
+    return game_tables.merge_cyber_elf_values(load_table_config(path, game_name), rom_path, game_name, path)
+
+def run_job(job):
+    with build_trace.trace_build(os.path.basename(job["output"])) as trace:
+        output_path = build_job(job)
+    return output_path, trace.get_summary() if trace else None
+
+def build_job(job):
+    rom_path = job["rom"]
+    output_path = job["output"]
+
+    config = load_json(job["config"])
+    game_name = config.get("game")
+    if game_name not in EXPECTED_MD5:
+        raise ValueError(f"Unknown game in patch config: {game_name}")
+
+    if os.path.abspath(output_path) == os.path.abspath(rom_path):
+        raise ValueError("You cannot overwrite a valid original ROM file.")
+
+    patch_list = patch_plan.get_patch_list(game_name, config.get("options", {}))
+    with build_trace.span("Checking patch conflicts", patches=len(patch_list)):
+        conflicts = patch_conflicts.find_conflicts(game_name, patch_list, bool(job.get("weapon_exp_config")),
+                                                   bool(job.get("cyber_elf_config")))
+    if conflicts:
+        raise ValueError("Conflicting patch selection:\n" + patch_conflicts.format_conflicts(conflicts))
+
+    error = get_rom_validation_error(rom_path, game_name)
+    if error:
+        raise ValueError(error)
+
+    weapon_exp_values = None
+    if job.get("weapon_exp_config"):
+        weapon_exp_values = load_weapon_exp_config(job["weapon_exp_config"], rom_path, game_name)
+
+    cyber_elf_values = None
+    if job.get("cyber_elf_config"):
+        cyber_elf_values = load_cyber_elf_config(job["cyber_elf_config"], rom_path, game_name)
+
+    if rom_builder.is_patch_output(output_path):
+        rom_builder.build_ips_patch(rom_path, output_path, game_name, EXPECTED_MD5[game_name], patch_list,
+                                    weapon_exp_values, cyber_elf_values)
+    else:
+        rom_builder.build_rom(rom_path, output_path, game_name, EXPECTED_MD5[game_name], patch_list,
+                              weapon_exp_values, cyber_elf_values)
+    return output_path
+
+def resolve_job_paths(job, base_dir):
+    resolved = dict(job)
+    for key in JOB_PATH_KEYS:
+        if resolved.get(key):
+            resolved[key] = os.path.abspath(os.path.join(base_dir, resolved[key]))
+    return resolved
+
+def load_manifest(manifest_path):
+    manifest = load_json(manifest_path)
+    jobs = manifest.get("jobs", []) if isinstance(manifest, dict) else manifest
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    return [resolve_job_paths(job, base_dir) for job in jobs]
+
+def run_jobs(jobs, max_workers=None):
+    failures = 0
+    summaries = []
+
+    def report(job, get_result):
+        nonlocal failures
+        try:
+            output_path, summary = get_result()
+            print(f"{output_path}: done")
+            if summary:
+                summaries.append(summary)
+        except Exception as e:
+            print(f"{job.get('output')}: failed: {e}", file=sys.stderr)
+            failures += 1
+
+    if len(jobs) == 1:
+        report(jobs[0], lambda: run_job(jobs[0]))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(run_job, job): job for job in jobs}
+            for future in as_completed(futures):
+                report(futures[future], future.result)
+
+    if summaries:
+        summary = build_trace.merge_summaries(summaries)
+        build_trace.print_summary(summary)
+        build_trace.write_summary(summary, build_trace.get_trace_dir())
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Patch Mega Man Zero ROMs without the GUI")
+    parser.add_argument("--rom", help="Source ROM file")
+    parser.add_argument("--config", help="Patch config JSON (as written by Export Config)")
+    parser.add_argument("--weapon-exp-config", help="Weapon EXP config JSON")
+    parser.add_argument("--cyber-elf-config", help="Cyber-Elf/Croire cost config JSON")
+    parser.add_argument("--output", help="Output ROM file, or an .ips file to write a patch instead")
+    parser.add_argument("--manifest", help="JSON manifest with a list of jobs using the keys " + ", ".join(JOB_PATH_KEYS))
+    parser.add_argument("--jobs", type=int, default=None, help="Number of jobs to run at once")
+    parser.add_argument("--compile-patches", action="store_true",
+                        help="Precompile the patch index for every patch combination and exit")
+    parser.add_argument("--import-presets", help="Import every preset JSON file in this folder into the preset store")
+    parser.add_argument("--export-presets", help="Export the latest version of every preset as JSON into this folder")
+    parser.add_argument("--memory-cap", type=parse_memory_cap,
+                        help="Stream patches through a fixed buffer so each build stays under this size "
+                             "(e.g. 1M, at least 192K)")
+    parser.add_argument("--cache-budget", type=parse_size,
+                        help="Keep at most this much of built ROMs in the output cache (e.g. 512M)")
+    parser.add_argument("--cache-stats", action="store_true",
+                        help="Print the output cache hit/miss counters and size and exit")
+    parser.add_argument("--revert", action="append", metavar="SOURCE",
+                        help="Revert a patch or table edit in the --output ROM in place, using its undo journal")
+    parser.add_argument("--reapply", action="append", metavar="SOURCE",
+                        help="Re-apply a reverted patch or table edit in the --output ROM in place")
+    args = parser.parse_args(argv)
+
+    if args.revert or args.reapply:
+        if not args.output:
+            parser.error("--revert and --reapply need --output")
+        try:
+            for source in args.revert or []:
+                print(f"Reverted {source} ({undo_journal.set_source_state(args.output, source, False)} bytes)")
+            for source in args.reapply or []:
+                print(f"Re-applied {source} ({undo_journal.set_source_state(args.output, source, True)} bytes)")
+            for source, state in undo_journal.get_source_states(args.output).items():
+                print(f"{source}: {state}")
+        except Exception as e:
+            print(f"Failed: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    if args.cache_stats:
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        stats = output_cache.get_cache_stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups if lookups else 0
+        print(f"Hits: {stats['hits']}, misses: {stats['misses']} ({hit_rate:.0%} hit rate)")
+        print(f"Entries: {stats['entries']}, {size_units.format_size(stats['size'])} "
+              f"of a {size_units.format_size(args.cache_budget or output_cache.get_cache_budget())} budget")
+        return 0
+
+    if args.compile_patches or args.import_presets or args.export_presets:
+        import_dir = os.path.abspath(args.import_presets) if args.import_presets else None
+        export_dir = os.path.abspath(args.export_presets) if args.export_presets else None
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        if args.compile_patches:
+            print(f"Compiled {patch_plan.compile_all_patch_plans()} patch indexes")
+        if import_dir:
+            print(f"Imported {preset_store.import_presets(import_dir)} presets")
+        if export_dir:
+            print(f"Exported {preset_store.export_presets(export_dir)} presets")
+        return 0
+
+    if args.manifest:
+        jobs = load_manifest(args.manifest)
+    elif args.rom and args.config and args.output:
+        jobs = [resolve_job_paths({
+            "rom": args.rom,
+            "config": args.config,
+            "weapon_exp_config": args.weapon_exp_config,
+            "cyber_elf_config": args.cyber_elf_config,
+            "output": args.output
+        }, os.getcwd())]
+    else:
+        parser.error("either --manifest or --rom, --config and --output are required")
+
+    if args.memory_cap:
+        os.environ[rom_builder.MEMORY_CAP_ENV] = str(args.memory_cap)
+    if args.cache_budget:
+        os.environ[output_cache.CACHE_BUDGET_ENV] = str(args.cache_budget)
+    if build_trace.get_trace_dir():
+        os.environ[build_trace.BUILD_TRACE_ENV] = os.path.abspath(build_trace.get_trace_dir())
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    return 1 if run_jobs(jobs, args.jobs) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
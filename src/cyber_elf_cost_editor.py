@@ -1,19 +1,11 @@
-import os
 import tkinter as tk
 from tkinter import messagebox, filedialog
 import fractions
 import random
 import json
 
-cyber_elf_cost_offsets = {
-    'Zero 1': (0x2B727C, 0x2B729A),
-    'Zero 2': (0x34A5C8, 0x34A5E5),
-    'Zero 3': (0x36E2C4, 0x36E30B),
-    'Zero 4': (0x886198, 0x8861A5)
-}
-
-DEFAULT_CONFIG_DIR = "default_configs"
-os.makedirs(DEFAULT_CONFIG_DIR, exist_ok=True)
+import game_tables
+import preset_store
 
 def open_cyber_elf_cost_editor(rom_path, game_name):
     editor = tk.Toplevel()
@@ -21,33 +13,18 @@ def open_cyber_elf_cost_editor(rom_path, game_name):
 
     entries = []
     original_values = []
-
-    start_offset, end_offset = cyber_elf_cost_offsets[game_name]
-    num_entries = (end_offset - start_offset) // 2 + 1
+    saved_values = []
 
     def read_values():
-        with open(rom_path, 'rb') as f:
-            f.seek(start_offset)
-            for i in range(num_entries):
-                data = f.read(2)
-                val = int.from_bytes(data, 'little')
-                if val != 0:
-                    var = tk.StringVar(value=str(val))
-                    entries.append((i, var))
-                    original_values.append(val)
-
-    def write_values():
+        for index, val in game_tables.read_cyber_elf_cost_values(rom_path, game_name):
+            entries.append((index, tk.StringVar(value=str(val))))
+            original_values.append(val)
+
+    def save_values():
         try:
-            with open(rom_path, 'r+b') as f:
-                for index, var in entries:
-                    val_str = var.get().strip()
-                    if not val_str.isdigit():
-                        raise ValueError(f"Invalid input at entry {index + 1}. Must be a non-negative integer.")
-                    val = int(val_str)
-                    if not (1 <= val <= 65535):
-                        raise ValueError(f"Value at entry {index + 1} out of range (1–65535).")
-                    f.seek(start_offset + index * 2)
-                    f.write(val.to_bytes(2, 'little'))
+            values = game_tables.validate_cyber_elf_cost_values(
+                game_name, [(index, var.get()) for index, var in entries])
+            saved_values.extend(values)
             editor.destroy()
         except ValueError as e:
             messagebox.showerror("Invalid Input", str(e))
@@ -139,28 +116,23 @@ def open_cyber_elf_cost_editor(rom_path, game_name):
             "game": game_name,
             "values": [var.get() for _, var in entries]
         }
-        path = os.path.join(DEFAULT_CONFIG_DIR, f"default_cyberelf_{game_name.replace(' ', '')}.json")
         try:
-            with open(path, 'w') as f:
-                json.dump(data, f, indent=2)
+            preset_store.save_preset(game_name, "cyber_elf", data)
             messagebox.showinfo("Saved", f"Default config saved for {game_name}.")
         except Exception as e:
             messagebox.showerror("Error", f"Could not save default config:\n{e}")
 
     read_values()
 
-    default_config_path = os.path.join(DEFAULT_CONFIG_DIR, f"default_cyberelf_{game_name.replace(' ', '')}.json")
-    if os.path.exists(default_config_path):
-        try:
-            with open(default_config_path, 'r') as f:
-                data = json.load(f)
-            if data.get("game") == game_name:
-                values = data.get("values", [])
-                if len(values) == len(entries):
-                    for (_, var), val in zip(entries, values):
-                        var.set(str(val))
-        except Exception as e:
-            print(f"Failed to load default cyber-elf config for {game_name}: {e}")
+    try:
+        data = preset_store.load_preset(game_name, "cyber_elf")
+        if data and data.get("game") == game_name:
+            values = data.get("values", [])
+            if len(values) == len(entries):
+                for (_, var), val in zip(entries, values):
+                    var.set(str(val))
+    except Exception as e:
+        print(f"Failed to load default cyber-elf config for {game_name}: {e}")
 
     for i, (index, var) in enumerate(entries):
         row = i // 3
@@ -187,7 +159,8 @@ def open_cyber_elf_cost_editor(rom_path, game_name):
     tk.Button(button_frame, text="Import Config", command=import_config).pack(side="left", padx=5)
     tk.Button(button_frame, text="Export Config", command=export_config).pack(side="left", padx=5)
     tk.Button(button_frame, text="Save As Default Config", command=save_as_default_config).pack(side="left", padx=5)
-    tk.Button(button_frame, text="Save and Close", command=write_values).pack(side="left", padx=5)
+    tk.Button(button_frame, text="Save and Close", command=save_values).pack(side="left", padx=5)
 
     editor.grab_set()
     editor.wait_window(editor)
+    return saved_values or None
@@ -0,0 +1,106 @@
+import os
+import shutil
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import atomic_file
+import build_trace
+
+FICLONE = 0x40049409
+COPY_CHUNK_SIZE = 1024 * 1024
+COPY_METHODS = ("reflinked", "linked", "kernel_copied", "buffered")
+
+_stats_lock = threading.Lock()
+_copy_stats = dict.fromkeys(COPY_METHODS, 0)
+
+def reflink(src_file, dst_file):
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        return True
+    except OSError:
+        return False
+
+def kernel_copy(src_file, dst_file, size):
+    copy_range = getattr(os, "copy_file_range", None)
+    send_file = getattr(os, "sendfile", None)
+    done = 0
+
+    for copy in (copy_range, send_file):
+        if copy is None:
+            continue
+        try:
+            while done < size:
+                if copy is copy_range:
+                    copied = copy(src_file.fileno(), dst_file.fileno(), size - done, done, done)
+                else:
+                    copied = copy(dst_file.fileno(), src_file.fileno(), done, size - done)
+                if not copied:
+                    break
+                done += copied
+            return done == size
+        except OSError:
+            if done:
+                raise
+    return False
+
+def buffered_copy(src_file, dst_file):
+    src_file.seek(0)
+    dst_file.seek(0)
+    dst_file.truncate()
+    shutil.copyfileobj(src_file, dst_file, COPY_CHUNK_SIZE)
+
+def record_copy(method, size):
+    with _stats_lock:
+        _copy_stats[method] += size
+
+def link_file(src, dst):
+    try:
+        os.remove(dst)
+        os.link(src, dst)
+        return True
+    except OSError:
+        return False
+
+def copy_file(src, dst, allow_hard_link=False, preserve_metadata=True):
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+    size = os.path.getsize(src)
+    with build_trace.span("Copying file", bytes=size) as span_args:
+        with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+            method = "reflinked" if reflink(src_file, dst_file) else None
+
+        if method is None and allow_hard_link and link_file(src, dst):
+            method = "linked"
+
+        if method is None:
+            with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+                if kernel_copy(src_file, dst_file, size):
+                    method = "kernel_copied"
+                else:
+                    buffered_copy(src_file, dst_file)
+                    method = "buffered"
+
+        if preserve_metadata and method != "linked":
+            shutil.copystat(src, dst)
+
+        span_args[method] = size
+        record_copy(method, size)
+    return method
+
+def unshare_file(path):
+    if os.stat(path).st_nlink == 1:
+        return
+    with atomic_file.atomic_path(path) as temp_path:
+        copy_file(path, temp_path)
+
+def get_copy_stats():
+    with _stats_lock:
+        stats = dict(_copy_stats)
+    stats["avoided"] = stats["reflinked"] + stats["linked"]
+    return stats
@@ -0,0 +1,131 @@
+import rom_tables
+
+weapon_offsets = {
+    'Zero 1': {
+        'Buster Shot': (0x2A8168, 4, ["Charged Buster", "Faster Charge"]),
+        'Z-Saber': (0x2A8184, 8, ["Second Slash", "Third Slash", "Charged Saber", "Faster Charge"]),
+        'Triple Rod': (0x2A81BE, 8, ["Second Stab", "Third Stab", "Charged Rod", "Faster Charge"]),
+        'Shield Boomerang': (0x2A81D6, 4, ["Farther Attack Range", "Farthest Attack Range"]),
+        'Buster 4 Shot Upgrade': (0x188A2, 1),
+        'Air Spin Slash': (0x18A60, 1),
+        'Dash Spin Slash': (0x18A1C, 1),
+    },
+    'Zero 2': {
+        'Buster Shot': (0x3359B4, 4, ["Charged Buster", "Faster Charge"]),
+        'Z-Saber': (0x3359C4, 8, ["Second Slash", "Third Slash", "Charged Saber", "Faster Charge"]),
+        'Chain Rod': (0x3359DA, 4, ["Charged Rod", "Faster Charge"]),
+        'Shield Boomerang': (0x3359E8, 4, ["Farther Attack Range", "Farthest Attack Range"]),
+    }
+}
+
+def get_weapon_exp_schemas(game_name):
+    if game_name not in weapon_offsets:
+        raise ValueError(f"{game_name} has no Weapon EXP table to edit.")
+    schemas = {}
+    for weapon, data in weapon_offsets[game_name].items():
+        offset, length = data[0], data[1]
+        width = 1 if length == 1 else 2
+        schemas[weapon] = rom_tables.TableSchema(weapon, offset, max(1, length // 2), width=width, monotonic=True)
+    return schemas
+
+def read_weapon_exp_values(rom_path, game_name):
+    with rom_tables.map_rom(rom_path) as rom:
+        return rom_tables.read_tables(rom, get_weapon_exp_schemas(game_name))
+
+def validate_weapon_exp_values(game_name, values):
+    validated = {}
+    for weapon, schema in get_weapon_exp_schemas(game_name).items():
+        weapon_values = []
+        for val in values[weapon]:
+            val_str = str(val).strip()
+            if not val_str.isdigit():
+                raise ValueError(
+                    f"Invalid value '{val_str}' for {weapon}. Only non-negative integers are allowed.")
+            weapon_values.append(int(val_str))
+
+        schema.validate(weapon_values)
+        validated[weapon] = weapon_values
+    return validated
+
+def apply_weapon_exp_values(rom, game_name, values):
+    rom_tables.write_tables(rom, get_weapon_exp_schemas(game_name), values)
+
+def write_weapon_exp_values(rom_path, game_name, values):
+    rom_tables.commit_tables(rom_path, get_weapon_exp_schemas(game_name), values)
+
+def get_weapon_exp_records(game_name, values):
+    schemas = get_weapon_exp_schemas(game_name)
+    records = []
+    for weapon, weapon_values in values.items():
+        schemas[weapon].validate(weapon_values)
+        records.append((schemas[weapon].offset, schemas[weapon].format.pack(*weapon_values), -1))
+    return records
+
+def merge_weapon_exp_values(config_values, rom_path, game_name):
+    values = read_weapon_exp_values(rom_path, game_name)
+    for weapon, weapon_values in (config_values or {}).items():
+        if weapon in values:
+            for i, val in enumerate(weapon_values):
+                values[weapon][i] = val
+    return validate_weapon_exp_values(game_name, values)
+
+cyber_elf_cost_offsets = {
+    'Zero 1': (0x2B727C, 0x2B729A),
+    'Zero 2': (0x34A5C8, 0x34A5E5),
+    'Zero 3': (0x36E2C4, 0x36E30B),
+    'Zero 4': (0x886198, 0x8861A5)
+}
+
+def get_cyber_elf_cost_schema(game_name):
+    start_offset, end_offset = cyber_elf_cost_offsets[game_name]
+    num_entries = (end_offset - start_offset) // 2 + 1
+    return rom_tables.TableSchema("Cyber-Elf costs", start_offset, num_entries, allow_zero_sentinel=True)
+
+def read_cyber_elf_cost_values(rom_path, game_name):
+    with rom_tables.map_rom(rom_path) as rom:
+        table = rom_tables.TableView(rom, get_cyber_elf_cost_schema(game_name)).get()
+    return [(i, val) for i, val in enumerate(table) if val != 0]
+
+def validate_cyber_elf_cost_values(game_name, values):
+    schema = get_cyber_elf_cost_schema(game_name)
+    validated = []
+    for index, val in values:
+        val_str = str(val).strip()
+        if not val_str.isdigit():
+            raise ValueError(f"Invalid input at entry {index + 1}. Must be a non-negative integer.")
+        val = int(val_str)
+        schema.check_value(val, f"entry {index + 1}")
+        validated.append((index, val))
+    return validated
+
+def update_cyber_elf_cost_table(rom, schema, values):
+    table = rom_tables.TableView(rom, schema).get()
+    for index, val in values:
+        table[index] = val
+    return table
+
+def apply_cyber_elf_cost_values(rom, game_name, values):
+    schema = get_cyber_elf_cost_schema(game_name)
+    rom_tables.TableView(rom, schema).set(update_cyber_elf_cost_table(rom, schema, values))
+
+def get_cyber_elf_cost_records(rom_path, game_name, values):
+    schema = get_cyber_elf_cost_schema(game_name)
+    with rom_tables.map_rom(rom_path) as rom:
+        table = update_cyber_elf_cost_table(rom, schema, values)
+    schema.validate(table)
+    return [(schema.offset, schema.format.pack(*table), -1)]
+
+def write_cyber_elf_cost_values(rom_path, game_name, values):
+    schema = get_cyber_elf_cost_schema(game_name)
+    with rom_tables.map_rom(rom_path) as rom:
+        table = update_cyber_elf_cost_table(rom, schema, values)
+    rom_tables.commit_tables(rom_path, {schema.name: schema}, {schema.name: table})
+
+def merge_cyber_elf_values(config_values, rom_path, game_name, config_name):
+    entries = read_cyber_elf_cost_values(rom_path, game_name)
+    values = config_values or []
+    if len(values) != len(entries):
+        raise ValueError(f"Config {config_name}: number of entries does not match.")
+    return validate_cyber_elf_cost_values(
+        game_name, [(index, val) for (index, _), val in zip(entries, values)]
+    )
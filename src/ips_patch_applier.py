@@ -1,23 +1,310 @@
-import ips
-import io
+import os
+import re
 
-def apply_ips_patches(file_path, save_path, ips_patch_files):
-    try:
-        with open(file_path, "rb") as f:
-            rom_stream = io.BytesIO(f.read())
+import atomic_file
+import rom_fingerprint
 
-        for patch_file_path in ips_patch_files:
-            with open(patch_file_path, 'rb') as patch_file:
-                patch_data = ips.Patch.load(patch_file)
+IPS_HEADER = b"PATCH"
+IPS_EOF = b"EOF"
+IPS_EOF_OFFSET = int.from_bytes(IPS_EOF, 'big')
+IPS_MAX_OFFSET = 0xFFFFFF
+IPS_MAX_RECORD_SIZE = 0xFFFF
+IPS_MERGE_GAP = 5
+IPS_RLE_MIN_RUN = 16
+IPS_WRITER_VERSION = 1
+NON_ZERO_BYTE = re.compile(rb'[^\x00]')
+ROM_CHUNK_SIZE = 1024 * 1024
+STREAM_CHUNK_SIZE = 1024 * 1024
+DIFF_CHUNK_SIZE = 4096
+PROGRESS_RECORD_STEP = 64
 
-                patched_stream = io.BytesIO()
-                patch_data.apply(rom_stream, patched_stream)
+def read_ips_records(patch_data):
+    if patch_data[:len(IPS_HEADER)] != IPS_HEADER:
+        raise ValueError("Invalid header for an IPS patch")
 
-                patched_stream.seek(0)
-                rom_stream = patched_stream
+    records = []
+    pos = len(IPS_HEADER)
 
-        with open(save_path, "wb") as f:
-            f.write(rom_stream.read())
+    while True:
+        offset_bytes = patch_data[pos:pos + 3]
+        if offset_bytes == IPS_EOF:
+            return records
+        if len(offset_bytes) < 3:
+            raise ValueError("Unexpected end of IPS patch")
 
-    except Exception as e:
-        print(f"Error: {e}")
\ No newline at end of file
+        offset = int.from_bytes(offset_bytes, 'big')
+        size = int.from_bytes(patch_data[pos + 3:pos + 5], 'big')
+        pos += 5
+
+        if size == 0:
+            rle_size = int.from_bytes(patch_data[pos:pos + 2], 'big')
+            records.append((offset, patch_data[pos + 2:pos + 3], rle_size))
+            pos += 3
+        else:
+            records.append((offset, patch_data[pos:pos + size], -1))
+            pos += size
+
+def load_ips_records(patch_file_path):
+    with open(patch_file_path, 'rb') as patch_file:
+        return read_ips_records(memoryview(rom_fingerprint.map_file(patch_file)))
+
+def apply_ips_records(rom, records, progress=None):
+    for count, (offset, content, rle_size) in enumerate(records, 1):
+        length = rle_size if rle_size >= 0 else len(content)
+        end = offset + length
+
+        if end > len(rom):
+            rom.extend(bytes(end - len(rom)))
+
+        if rle_size >= 0:
+            rom[offset:end] = bytes(content) * rle_size
+        else:
+            rom[offset:end] = content
+
+        if progress and (count % PROGRESS_RECORD_STEP == 0 or count == len(records)):
+            progress("Applying patches", count, len(records))
+
+def apply_patch_index(rom, index, progress=None):
+    offsets, lengths, rle_flags, payload = index.offsets, index.lengths, index.rle_flags, index.payload
+    pos = 0
+
+    for i in range(len(offsets)):
+        offset = offsets[i]
+        length = lengths[i]
+        end = offset + length
+
+        if end > len(rom):
+            rom.extend(bytes(end - len(rom)))
+
+        if rle_flags[i]:
+            rom[offset:end] = payload[pos:pos + 1].tobytes() * length
+            pos += 1
+        else:
+            rom[offset:end] = payload[pos:pos + length]
+            pos += length
+
+        if progress and ((i + 1) % PROGRESS_RECORD_STEP == 0 or i + 1 == len(offsets)):
+            progress("Applying patches", i + 1, len(offsets))
+
+def fill_run(view, start, end, value):
+    if end <= start:
+        return
+    view[start] = value
+    filled = 1
+    while filled < end - start:
+        step = min(filled, end - start - filled)
+        view[start + filled:start + filled + step] = view[start:start + step]
+        filled += step
+
+def splice_records(chunk, start, records):
+    end = start + len(chunk)
+    for offset, content, rle_size in records:
+        clip_start = max(offset, start)
+        clip_end = min(offset + (rle_size if rle_size >= 0 else len(content)), end)
+        if clip_start >= clip_end:
+            continue
+        if rle_size >= 0:
+            fill_run(chunk, clip_start - start, clip_end - start, content[0])
+        else:
+            chunk[clip_start - start:clip_end - start] = content[clip_start - offset:clip_end - offset]
+
+def stream_patch_index(file_path, save_path, index, chunk_size=STREAM_CHUNK_SIZE, progress=None, hasher=None,
+                       records=()):
+    offsets, lengths, rle_flags, payload = index.offsets, index.lengths, index.rle_flags, index.payload
+    source_size = os.path.getsize(file_path)
+    total = max(source_size, offsets[-1] + lengths[-1]) if len(offsets) else source_size
+    for offset, content, rle_size in records:
+        total = max(total, offset + (rle_size if rle_size >= 0 else len(content)))
+    buffer = bytearray(min(chunk_size, max(total, 1)))
+    i = 0
+    pos = 0
+
+    with open(file_path, "rb") as src, open(save_path, "wb") as dst, memoryview(buffer) as view:
+        for start in range(0, total, len(buffer)):
+            end = min(start + len(buffer), total)
+            chunk = view[:end - start]
+            read = src.readinto(chunk) if start < source_size else 0
+            fill_run(chunk, read, len(chunk), 0)
+
+            while i < len(offsets) and offsets[i] < end:
+                record_start = offsets[i]
+                record_end = record_start + lengths[i]
+                clip_start = max(record_start, start)
+                clip_end = min(record_end, end)
+                if rle_flags[i]:
+                    fill_run(chunk, clip_start - start, clip_end - start, payload[pos])
+                else:
+                    chunk[clip_start - start:clip_end - start] = \
+                        payload[pos + clip_start - record_start:pos + clip_end - record_start]
+                if record_end > end:
+                    break
+                pos += 1 if rle_flags[i] else lengths[i]
+                i += 1
+
+            splice_records(chunk, start, records)
+            dst.write(chunk)
+            if hasher:
+                hasher.update(chunk)
+            if progress:
+                progress("Streaming patches", end, total)
+        dst.flush()
+        os.fsync(dst.fileno())
+    return hasher.hexdigest() if hasher else None
+
+def read_rom(file_path, progress=None):
+    rom = bytearray(os.path.getsize(file_path))
+    done = 0
+
+    with open(file_path, "rb") as f, memoryview(rom) as view:
+        while done < len(rom):
+            read = f.readinto(view[done:done + ROM_CHUNK_SIZE])
+            if not read:
+                break
+            done += read
+            if progress:
+                progress("Reading ROM", done, len(rom))
+
+    del rom[done:]
+    return rom
+
+def write_rom(save_path, rom, progress=None):
+    with open(save_path, "wb") as f, memoryview(rom) as view:
+        for start in range(0, len(rom), ROM_CHUNK_SIZE):
+            f.write(view[start:start + ROM_CHUNK_SIZE])
+            if progress:
+                progress("Writing ROM", min(start + ROM_CHUNK_SIZE, len(rom)), len(rom))
+
+def write_rom_atomic(save_path, rom, progress=None, hasher=None, check=None):
+    with atomic_file.atomic_write(save_path, fsync=True) as f, memoryview(rom) as view:
+        for start in range(0, len(rom), ROM_CHUNK_SIZE):
+            chunk = view[start:start + ROM_CHUNK_SIZE]
+            f.write(chunk)
+            if hasher:
+                hasher.update(chunk)
+            if progress:
+                progress("Writing ROM", min(start + ROM_CHUNK_SIZE, len(rom)), len(rom))
+        digest = hasher.hexdigest() if hasher else None
+        if check:
+            check(digest)
+    return digest
+
+def apply_ips_patches(file_path, save_path, ips_patch_files, progress=None):
+    rom = read_rom(file_path, progress)
+
+    for patch_file_path in ips_patch_files:
+        apply_ips_records(rom, load_ips_records(patch_file_path), progress)
+
+    write_rom(save_path, rom, progress)
+
+def find_changed_ranges(original, modified):
+    ranges = []
+    start = None
+    common_length = min(len(original), len(modified))
+
+    for chunk_start in range(0, common_length, DIFF_CHUNK_SIZE):
+        chunk_end = min(chunk_start + DIFF_CHUNK_SIZE, common_length)
+        if original[chunk_start:chunk_end] == modified[chunk_start:chunk_end]:
+            if start is not None:
+                ranges.append((start, chunk_start))
+                start = None
+            continue
+
+        for pos in range(chunk_start, chunk_end):
+            if original[pos] != modified[pos]:
+                if start is None:
+                    start = pos
+            elif start is not None:
+                ranges.append((start, pos))
+                start = None
+
+    if start is not None:
+        ranges.append((start, common_length))
+    if len(modified) > common_length:
+        ranges.append((common_length, len(modified)))
+
+    merged = []
+    for start, end in ranges:
+        if merged and start - merged[-1][1] <= IPS_MERGE_GAP:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def find_byte_runs(data, start, end):
+    if end - start < IPS_RLE_MIN_RUN:
+        return
+
+    left = int.from_bytes(data[start:end - 1], 'little')
+    right = int.from_bytes(data[start + 1:end], 'little')
+    same_as_next = (left ^ right).to_bytes(end - start - 1, 'little')
+    zero_run = bytes(IPS_RLE_MIN_RUN - 1)
+
+    pos = same_as_next.find(zero_run)
+    while pos >= 0:
+        run_end = NON_ZERO_BYTE.search(same_as_next, pos)
+        run_end = run_end.start() if run_end else len(same_as_next)
+        yield start + pos, start + run_end + 1
+        pos = same_as_next.find(zero_run, run_end + 1)
+
+def split_range_records(modified, start, end):
+    records = []
+    pos = start
+
+    for run_start, run_end in find_byte_runs(modified, start, end):
+        if run_start > pos:
+            records.append((pos, bytes(modified[pos:run_start]), -1))
+        records.append((run_start, bytes(modified[run_start:run_start + 1]), run_end - run_start))
+        pos = run_end
+
+    if pos < end:
+        records.append((pos, bytes(modified[pos:end]), -1))
+
+    split_records = []
+    for offset, content, rle_size in records:
+        length = rle_size if rle_size >= 0 else len(content)
+        for part in range(0, length, IPS_MAX_RECORD_SIZE):
+            part_size = min(IPS_MAX_RECORD_SIZE, length - part)
+            if rle_size >= 0:
+                split_records.append((offset + part, content, part_size))
+            else:
+                split_records.append((offset + part, content[part:part + part_size], -1))
+    return split_records
+
+def avoid_eof_offset(records, modified):
+    fixed_records = []
+    for offset, content, rle_size in records:
+        if offset != IPS_EOF_OFFSET:
+            fixed_records.append((offset, content, rle_size))
+            continue
+
+        fixed_records.append((offset - 1, bytes(modified[offset - 1:offset + 1]), -1))
+        if rle_size > 1:
+            fixed_records.append((offset + 1, content, rle_size - 1))
+        elif rle_size < 0 and len(content) > 1:
+            fixed_records.append((offset + 1, content[1:], -1))
+    return fixed_records
+
+def create_ips_records(original, modified):
+    if len(modified) < len(original):
+        raise ValueError("IPS patches cannot shrink a ROM")
+    if len(modified) > IPS_MAX_OFFSET + 1:
+        raise ValueError("ROM is too large for an IPS patch")
+
+    records = []
+    for start, end in find_changed_ranges(original, modified):
+        records.extend(split_range_records(modified, start, end))
+    return avoid_eof_offset(records, modified)
+
+def write_ips_records(records):
+    patch_data = bytearray(IPS_HEADER)
+    for offset, content, rle_size in records:
+        patch_data += offset.to_bytes(3, 'big')
+        if rle_size >= 0:
+            patch_data += b"\x00\x00" + rle_size.to_bytes(2, 'big') + content
+        else:
+            patch_data += len(content).to_bytes(2, 'big') + content
+    patch_data += IPS_EOF
+    return bytes(patch_data)
+
+def create_ips_patch(original, modified):
+    return write_ips_records(create_ips_records(original, modified))
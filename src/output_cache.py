@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import atomic_file
+import file_copy
+import patch_plan
+import size_units
+
+OUTPUT_CACHE_DIR = "output_cache"
+OUTPUT_CACHE_INDEX = "index.json"
+OUTPUT_CACHE_LOCK = "index.lock"
+OUTPUT_CACHE_BUDGET = 512 * 1024 * 1024
+CACHE_BUDGET_ENV = "MMZ_PATCHER_CACHE_BUDGET"
+
+_index_lock = threading.Lock()
+
+@contextmanager
+def lock_index():
+    os.makedirs(OUTPUT_CACHE_DIR, exist_ok=True)
+    with _index_lock, atomic_file.file_lock(os.path.join(OUTPUT_CACHE_DIR, OUTPUT_CACHE_LOCK)):
+        yield
+
+def get_output_key(source_md5, patch_files, weapon_exp_values=None, cyber_elf_values=None):
+    key_data = {
+        'source_md5': source_md5,
+        'patches': [patch_plan.hash_patch_file(path) for path in patch_files],
+        'weapon_exp': weapon_exp_values,
+        'cyber_elf': [list(entry) for entry in cyber_elf_values] if cyber_elf_values else None
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+def link_or_copy(src, dst):
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return
+
+    with atomic_file.atomic_path(dst) as temp_path:
+        file_copy.copy_file(src, temp_path, allow_hard_link=True)
+
+def load_index():
+    index_path = os.path.join(OUTPUT_CACHE_DIR, OUTPUT_CACHE_INDEX)
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Failed to load output cache index: {e}")
+    return {"entries": {}, "hits": 0, "misses": 0}
+
+def save_index(index):
+    os.makedirs(OUTPUT_CACHE_DIR, exist_ok=True)
+    index_path = os.path.join(OUTPUT_CACHE_DIR, OUTPUT_CACHE_INDEX)
+    with atomic_file.atomic_write(index_path, 'w') as f:
+        json.dump(index, f, indent=2)
+
+def get_entry_path(key):
+    return os.path.join(OUTPUT_CACHE_DIR, f"{key}.gba")
+
+def fetch_output(key, save_path):
+    with lock_index():
+        index = load_index()
+        entry = index["entries"].get(key)
+        entry_path = get_entry_path(key)
+
+        if entry is None or not os.path.isfile(entry_path):
+            index["entries"].pop(key, None)
+            index["misses"] += 1
+            save_index(index)
+            return False
+
+        try:
+            link_or_copy(entry_path, save_path)
+        except Exception as e:
+            print(f"Failed to serve cached output {key}: {e}")
+            index["misses"] += 1
+            save_index(index)
+            return False
+
+        entry["last_used"] = time.time()
+        index["hits"] += 1
+        save_index(index)
+        return True
+
+def evict_entries(index, budget):
+    total_size = sum(entry["size"] for entry in index["entries"].values())
+    by_last_used = sorted(index["entries"].items(), key=lambda item: item[1]["last_used"])
+
+    for key, entry in by_last_used:
+        if total_size <= budget:
+            break
+        try:
+            os.remove(get_entry_path(key))
+        except FileNotFoundError:
+            pass
+        del index["entries"][key]
+        total_size -= entry["size"]
+
+def get_cache_budget():
+    value = os.environ.get(CACHE_BUDGET_ENV)
+    return size_units.parse_size(value) if value else OUTPUT_CACHE_BUDGET
+
+def store_output(key, output_path, budget=None):
+    budget = budget or get_cache_budget()
+    size = os.path.getsize(output_path)
+    if size > budget:
+        return
+
+    with lock_index():
+        try:
+            os.makedirs(OUTPUT_CACHE_DIR, exist_ok=True)
+            link_or_copy(output_path, get_entry_path(key))
+        except Exception as e:
+            print(f"Failed to store output {key} in cache: {e}")
+            return
+
+        index = load_index()
+        index["entries"][key] = {"size": size, "last_used": time.time()}
+        evict_entries(index, budget)
+        save_index(index)
+
+def get_cache_stats():
+    with lock_index():
+        index = load_index()
+    return {
+        "hits": index["hits"],
+        "misses": index["misses"],
+        "entries": len(index["entries"]),
+        "size": sum(entry["size"] for entry in index["entries"].values())
+    }
@@ -0,0 +1,58 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import atomic_file
+
+OUTPUT_MANIFEST_FILE = "output_manifest.json"
+OUTPUT_MANIFEST_VERSION = 1
+
+_manifest_lock = threading.Lock()
+
+@contextmanager
+def lock_manifest():
+    with _manifest_lock, atomic_file.file_lock(f"{OUTPUT_MANIFEST_FILE}.lock"):
+        yield
+
+def new_hasher():
+    return hashlib.sha256()
+
+def load_manifest():
+    if os.path.exists(OUTPUT_MANIFEST_FILE):
+        try:
+            with open(OUTPUT_MANIFEST_FILE, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Failed to load output manifest: {e}")
+    return {}
+
+def save_manifest(manifest):
+    try:
+        with atomic_file.atomic_write(OUTPUT_MANIFEST_FILE, 'w') as f:
+            json.dump(manifest, f, indent=2)
+    except Exception as e:
+        print(f"Failed to save output manifest: {e}")
+
+def get_manifest_key(key):
+    return f"v{OUTPUT_MANIFEST_VERSION}:{key}"
+
+def get_expected_digest(key):
+    with lock_manifest():
+        return load_manifest().get(get_manifest_key(key))
+
+def check_output_digest(key, digest):
+    with lock_manifest():
+        manifest = load_manifest()
+        expected = manifest.get(get_manifest_key(key))
+        if expected is None:
+            manifest[get_manifest_key(key)] = digest
+            save_manifest(manifest)
+            return True
+        return expected == digest
+
+def verify_output(key, digest, save_path):
+    if not check_output_digest(key, digest):
+        raise ValueError(f"The output for {save_path} does not match the one previously built with these options "
+                         f"(SHA-256 {digest}, expected {get_expected_digest(key)}), so it was not saved.")
@@ -0,0 +1,137 @@
+import bisect
+import hashlib
+import itertools
+import os
+import pickle
+
+import atomic_file
+import game_tables
+import ips_patch_applier
+import patch_plan
+
+CONFLICT_INDEX_VERSION = 1
+WEAPON_EXP_SOURCE = "Weapon EXP table"
+
+_patch_ranges = {}
+_conflict_indexes = {}
+
+class IntervalIndex:
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals)
+        self.starts = [interval[0] for interval in self.intervals]
+        self.max_ends = list(itertools.accumulate((interval[1] for interval in self.intervals), max))
+
+    def query(self, start, stop):
+        found = []
+        i = bisect.bisect_left(self.starts, stop) - 1
+        while i >= 0 and self.max_ends[i] > start:
+            if self.intervals[i][1] > start:
+                found.append(self.intervals[i])
+            i -= 1
+        found.reverse()
+        return found
+
+def coalesce_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(span) for span in merged]
+
+def get_patch_ranges(patch_file_path):
+    patch_hash = patch_plan.hash_patch_file(patch_file_path)
+    if patch_hash not in _patch_ranges:
+        records = ips_patch_applier.load_ips_records(patch_file_path)
+        _patch_ranges[patch_hash] = coalesce_ranges((record[0], patch_plan.record_end(record)) for record in records)
+    return _patch_ranges[patch_hash]
+
+def get_table_ranges(game_name):
+    ranges = {}
+    if game_name in game_tables.weapon_offsets:
+        schemas = game_tables.get_weapon_exp_schemas(game_name).values()
+        ranges[WEAPON_EXP_SOURCE] = coalesce_ranges((schema.offset, schema.end) for schema in schemas)
+    schema = game_tables.get_cyber_elf_cost_schema(game_name)
+    ranges[schema.name] = [(schema.offset, schema.end)]
+    return ranges
+
+def get_source_ranges(game_name):
+    ranges = {
+        f"{patch_plan.PATCH_DIR}/{patch_file}": get_patch_ranges(f"{patch_plan.PATCH_DIR}/{patch_file}")
+        for _, patch_file in patch_plan.GAME_PATCHES.get(game_name, [])
+    }
+    ranges.update(get_table_ranges(game_name))
+    return ranges
+
+def build_conflict_index(source_ranges):
+    index = IntervalIndex(
+        (start, end, source) for source, ranges in source_ranges.items() for start, end in ranges
+    )
+    conflicts = {}
+    for start, end, source in index.intervals:
+        for other_start, other_end, other_source in index.query(start, end):
+            if other_source <= source:
+                continue
+            pair = (source, other_source)
+            conflicts.setdefault(pair, []).append((max(start, other_start), min(end, other_end)))
+    return {pair: coalesce_ranges(ranges) for pair, ranges in conflicts.items()}
+
+def get_conflict_key(game_name):
+    key_hash = hashlib.sha256(f"v{CONFLICT_INDEX_VERSION}:{game_name}".encode())
+    for _, patch_file in patch_plan.GAME_PATCHES.get(game_name, []):
+        key_hash.update(patch_plan.hash_patch_file(f"{patch_plan.PATCH_DIR}/{patch_file}").encode())
+    for source, ranges in sorted(get_table_ranges(game_name).items()):
+        key_hash.update(repr((source, ranges)).encode())
+    return key_hash.hexdigest()
+
+def load_conflict_index(game_name):
+    key = get_conflict_key(game_name)
+    if key in _conflict_indexes:
+        return _conflict_indexes[key]
+
+    index_path = os.path.join(patch_plan.PATCH_PLAN_CACHE_DIR, f"{key}.conflicts")
+    conflicts = None
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, 'rb') as f:
+                conflicts = pickle.load(f)
+        except Exception as e:
+            print(f"Failed to load cached conflict index {index_path}: {e}")
+
+    if conflicts is None:
+        conflicts = build_conflict_index(get_source_ranges(game_name))
+        try:
+            os.makedirs(patch_plan.PATCH_PLAN_CACHE_DIR, exist_ok=True)
+            with atomic_file.atomic_write(index_path) as f:
+                pickle.dump(conflicts, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"Failed to cache conflict index {index_path}: {e}")
+
+    _conflict_indexes[key] = conflicts
+    return conflicts
+
+def get_selected_sources(game_name, patch_list, weapon_exp=False, cyber_elf=False):
+    sources = list(patch_list)
+    if weapon_exp and game_name in game_tables.weapon_offsets:
+        sources.append(WEAPON_EXP_SOURCE)
+    if cyber_elf:
+        sources.append(game_tables.get_cyber_elf_cost_schema(game_name).name)
+    return sources
+
+def find_conflicts(game_name, patch_list, weapon_exp=False, cyber_elf=False):
+    sources = get_selected_sources(game_name, patch_list, weapon_exp, cyber_elf)
+    conflicts = load_conflict_index(game_name)
+    found = []
+    for pair in itertools.combinations(sorted(sources), 2):
+        for start, end in conflicts.get(pair, []):
+            found.append((pair[0], pair[1], start, end))
+    return found
+
+def format_conflicts(conflicts):
+    return "\n".join(
+        f"{source} and {other_source} both write 0x{start:06X}-0x{end - 1:06X}"
+        for source, other_source, start, end in conflicts
+    )
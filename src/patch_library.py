@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import queue
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import build_trace
+import game_tables
+import patch_conflicts
+import patch_plan
+import patch_worker
+import preset_store
+import rom_builder
+from rom_info import EXPECTED_MD5
+
+LIBRARY_POLL_INTERVAL = 0.05
+LIBRARY_OUTPUT_SUFFIX = "_patched.gba"
+
+def get_library_output_path(output_dir, game_name):
+    return os.path.join(output_dir, f"{game_name.replace(' ', '')}{LIBRARY_OUTPUT_SUFFIX}")
+
+def get_library_job(game_name, rom_path, output_dir):
+    config = preset_store.load_preset(game_name, "options") or {}
+    options = config.get("options", {})
+    patch_list = patch_plan.get_patch_list(game_name, options)
+
+    weapon_exp_values = None
+    if options.get("modify_weapon_exp"):
+        preset = preset_store.load_preset(game_name, "weapon_exp")
+        if preset:
+            weapon_exp_values = game_tables.merge_weapon_exp_values(preset.get("values"), rom_path, game_name)
+
+    cyber_elf_values = None
+    if options.get("modify_cyber_elf_costs"):
+        preset = preset_store.load_preset(game_name, "cyber_elf")
+        if preset:
+            cyber_elf_values = game_tables.merge_cyber_elf_values(preset.get("values"), rom_path, game_name,
+                                                                  f"default {game_name} Cyber-Elf preset")
+
+    output_path = get_library_output_path(output_dir, game_name)
+    if os.path.abspath(output_path) == os.path.abspath(rom_path):
+        raise ValueError("You cannot overwrite a valid original ROM file.")
+
+    conflicts = patch_conflicts.find_conflicts(game_name, patch_list, bool(weapon_exp_values),
+                                               bool(cyber_elf_values))
+    if conflicts:
+        raise ValueError("Conflicting patch selection:\n" + patch_conflicts.format_conflicts(conflicts))
+
+    return {
+        "game": game_name,
+        "rom": rom_path,
+        "output": output_path,
+        "patches": patch_list,
+        "weapon_exp": weapon_exp_values,
+        "cyber_elf": cyber_elf_values
+    }
+
+def build_library_game(job, progress_queue, cancel_event):
+    game_name = job["game"]
+
+    def progress(stage, done, total):
+        if cancel_event.is_set():
+            raise patch_worker.BuildCancelled()
+        progress_queue.put((game_name, stage, done, total))
+
+    with build_trace.trace_build(os.path.basename(job["output"])):
+        rom_builder.build_rom(job["rom"], job["output"], game_name, EXPECTED_MD5[game_name], job["patches"],
+                              job["weapon_exp"], job["cyber_elf"], progress)
+    return job["output"]
+
+def forward_progress(progress_queue, progress):
+    while True:
+        try:
+            game_name, stage, done, total = progress_queue.get_nowait()
+        except queue.Empty:
+            return
+        progress((game_name, stage), done, total)
+
+def build_library(jobs, progress, max_workers=None):
+    results = {}
+    max_workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=max_workers) as pool:
+        progress_queue = manager.Queue()
+        cancel_event = manager.Event()
+        futures = {pool.submit(build_library_game, job, progress_queue, cancel_event): job["game"] for job in jobs}
+        pending = set(futures)
+        try:
+            while pending:
+                finished, pending = wait(pending, timeout=LIBRARY_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                forward_progress(progress_queue, progress)
+                for future in finished:
+                    game_name = futures[future]
+                    try:
+                        results[game_name] = (future.result(), None)
+                        progress((game_name, "Done"), 1, 1)
+                    except Exception as e:
+                        results[game_name] = (None, e)
+                        progress((game_name, f"Failed: {e}"), 1, 1)
+        except BaseException:
+            cancel_event.set()
+            pool.shutdown(cancel_futures=True)
+            raise
+    return results
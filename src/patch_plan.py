@@ -0,0 +1,204 @@
+import array
+import bisect
+import hashlib
+import io
+import itertools
+import mmap
+import os
+import struct
+import sys
+
+import atomic_file
+import ips_patch_applier
+import rom_fingerprint
+
+PATCH_DIR = "patches"
+PATCH_PLAN_CACHE_DIR = "patch_plans"
+PATCH_PLAN_VERSION = 2
+PATCH_INDEX_MAGIC = b"MMZP"
+PATCH_INDEX_HEADER = struct.Struct('<4sBBxxII')
+
+GAME_PATCHES = {
+    'Zero 1': [
+        ('no_elf_penalty', 'mmz1_mission_penalty.ips'),
+        ('retry_chips', 'mmz1_9_retries.ips'),
+        ('blood_restore', 'mmz1_blood.ips'),
+    ],
+    'Zero 2': [
+        ('ex_skill', 'mmz2_easyexskill.ips'),
+        ('no_elf_penalty', 'mmz2_mission_penalty.ips'),
+        ('blood_restore', 'mmz2_blood.ips'),
+    ],
+    'Zero 3': [
+        ('ex_skill', 'mmz3_easyexskill.ips'),
+        ('bn_viruses', 'mmz3_exevirus.ips'),
+        ('blood_restore', 'mmz3_blood.ips'),
+    ],
+    'Zero 4': [
+        ('vocal_restore', 'mmz4_vocals.ips'),
+        ('blood_restore', 'mmz4_blood.ips'),
+    ]
+}
+
+_patch_hashes = {}
+_patch_indexes = {}
+
+def get_patch_list(game_name, options):
+    return [
+        f"{PATCH_DIR}/{patch_file}"
+        for option, patch_file in GAME_PATCHES.get(game_name, [])
+        if options.get(option)
+    ]
+
+def hash_patch_file(patch_file_path):
+    stat = os.stat(patch_file_path)
+    key = (os.path.abspath(patch_file_path), stat.st_size, stat.st_mtime_ns)
+    if key not in _patch_hashes:
+        with open(patch_file_path, 'rb') as f:
+            _patch_hashes[key] = hashlib.sha256(rom_fingerprint.map_file(f)).hexdigest()
+    return _patch_hashes[key]
+
+def get_plan_key(patch_files):
+    plan_hash = hashlib.sha256(f"v{PATCH_PLAN_VERSION}".encode())
+    for patch_file_path in patch_files:
+        plan_hash.update(hash_patch_file(patch_file_path).encode())
+    return plan_hash.hexdigest()
+
+def record_end(record):
+    offset, content, rle_size = record
+    return offset + (rle_size if rle_size >= 0 else len(content))
+
+def clip_record(record, start, stop):
+    offset, content, rle_size = record
+    if rle_size >= 0:
+        return start, content, stop - start
+    return start, content[start - offset:stop - offset], -1
+
+def merge_records(record_lists):
+    starts = []
+    merged = []
+
+    for records in record_lists:
+        for record in records:
+            offset = record[0]
+            end = record_end(record)
+            if end == offset:
+                continue
+
+            first = bisect.bisect_right(starts, offset)
+            if first > 0 and record_end(merged[first - 1]) > offset:
+                first -= 1
+            last = first
+            while last < len(merged) and merged[last][0] < end:
+                last += 1
+
+            pieces = [record]
+            if first < last:
+                if merged[first][0] < offset:
+                    pieces.insert(0, clip_record(merged[first], merged[first][0], offset))
+                last_end = record_end(merged[last - 1])
+                if last_end > end:
+                    pieces.append(clip_record(merged[last - 1], end, last_end))
+
+            merged[first:last] = pieces
+            starts[first:last] = [piece[0] for piece in pieces]
+
+    return merged
+
+def compile_patch_plan(patch_files, progress=None):
+    record_lists = []
+    for count, patch_file_path in enumerate(patch_files, 1):
+        record_lists.append(ips_patch_applier.load_ips_records(patch_file_path))
+        if progress:
+            progress("Loading patches", count, len(patch_files))
+    return merge_records(record_lists)
+
+def write_patch_index(f, records):
+    offsets = array.array('I')
+    lengths = array.array('I')
+    rle_flags = bytearray()
+    payload_size = 0
+
+    for offset, content, rle_size in records:
+        offsets.append(offset)
+        lengths.append(rle_size if rle_size >= 0 else len(content))
+        rle_flags.append(1 if rle_size >= 0 else 0)
+        payload_size += len(content)
+
+    f.write(PATCH_INDEX_HEADER.pack(PATCH_INDEX_MAGIC, PATCH_PLAN_VERSION, sys.byteorder == 'big',
+                                    len(records), payload_size))
+    f.write(offsets)
+    f.write(lengths)
+    f.write(rle_flags)
+    f.write(bytes(-len(rle_flags) % 4))
+    for _, content, _ in records:
+        f.write(content)
+
+def encode_patch_index(records):
+    buffer = io.BytesIO()
+    write_patch_index(buffer, records)
+    return buffer.getvalue()
+
+class PatchIndex:
+    def __init__(self, buffer):
+        magic, version, big_endian, count, payload_size = PATCH_INDEX_HEADER.unpack_from(buffer, 0)
+        if magic != PATCH_INDEX_MAGIC or version != PATCH_PLAN_VERSION or big_endian != (sys.byteorder == 'big'):
+            raise ValueError("Patch index was written by a different version or platform")
+
+        view = memoryview(buffer)
+        pos = PATCH_INDEX_HEADER.size
+        self.buffer = buffer
+        self.offsets = view[pos:pos + count * 4].cast('I')
+        pos += count * 4
+        self.lengths = view[pos:pos + count * 4].cast('I')
+        pos += count * 4
+        self.rle_flags = view[pos:pos + count]
+        pos += count + (-count % 4)
+        self.payload = view[pos:pos + payload_size]
+        if len(self.payload) != payload_size:
+            raise ValueError("Patch index is truncated")
+
+    def __len__(self):
+        return len(self.offsets)
+
+def map_patch_index(index_path):
+    with open(index_path, 'rb') as f:
+        return PatchIndex(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+def load_patch_plan(patch_files, progress=None):
+    if not patch_files:
+        return PatchIndex(encode_patch_index([]))
+
+    plan_key = get_plan_key(patch_files)
+    if plan_key in _patch_indexes:
+        return _patch_indexes[plan_key]
+
+    index_path = os.path.join(PATCH_PLAN_CACHE_DIR, f"{plan_key}.pidx")
+    if os.path.exists(index_path):
+        try:
+            _patch_indexes[plan_key] = map_patch_index(index_path)
+            return _patch_indexes[plan_key]
+        except Exception as e:
+            print(f"Failed to load compiled patch index {index_path}: {e}")
+
+    records = compile_patch_plan(patch_files, progress)
+
+    try:
+        os.makedirs(PATCH_PLAN_CACHE_DIR, exist_ok=True)
+        with atomic_file.atomic_write(index_path) as f:
+            write_patch_index(f, records)
+        _patch_indexes[plan_key] = map_patch_index(index_path)
+    except Exception as e:
+        print(f"Failed to cache compiled patch index {index_path}: {e}")
+        _patch_indexes[plan_key] = PatchIndex(encode_patch_index(records))
+    return _patch_indexes[plan_key]
+
+def compile_all_patch_plans():
+    compiled = 0
+    for game_name, patches in GAME_PATCHES.items():
+        patch_files = [f"{PATCH_DIR}/{patch_file}" for _, patch_file in patches]
+        for count in range(1, len(patch_files) + 1):
+            for selection in itertools.combinations(patch_files, count):
+                load_patch_plan(list(selection))
+                compiled += 1
+    return compiled
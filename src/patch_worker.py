@@ -0,0 +1,37 @@
+import queue
+import threading
+
+class BuildCancelled(Exception):
+    pass
+
+class PatchWorker(threading.Thread):
+    def __init__(self, task):
+        super().__init__(daemon=True)
+        self.task = task
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            result = self.task(progress=self.report_progress)
+        except BuildCancelled:
+            self.events.put(("cancelled", None))
+        except Exception as e:
+            self.events.put(("error", e))
+        else:
+            self.events.put(("done", result))
+
+    def report_progress(self, stage, done, total):
+        if self.cancel_event.is_set():
+            raise BuildCancelled()
+        self.events.put(("progress", (stage, done, total)))
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def poll_events(self):
+        while True:
+            try:
+                yield self.events.get_nowait()
+            except queue.Empty:
+                return
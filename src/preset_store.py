@@ -0,0 +1,148 @@
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+PRESET_DB_FILE = "presets.db"
+PRESET_DB_TIMEOUT = 30
+LEGACY_CONFIG_DIR = "default_configs"
+DEFAULT_PRESET_NAME = "default"
+PRESET_KINDS = ("options", "weapon_exp", "cyber_elf")
+LEGACY_FILE_PREFIXES = ("default_config_", "default_weaponexp_", "default_cyberelf_")
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS presets (
+    game TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (game, kind, name, version)
+) WITHOUT ROWID;
+DROP INDEX IF EXISTS presets_by_name;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+LATEST_VERSION_SQL = "SELECT COALESCE(MAX(version), 0) FROM presets WHERE game = ? AND kind = ? AND name = ?"
+INSERT_SQL = "INSERT INTO presets (game, kind, name, version, data, created) VALUES (?, ?, ?, ?, ?, ?)"
+LOAD_LATEST_SQL = ("SELECT data FROM presets WHERE game = ? AND kind = ? AND name = ? "
+                   "ORDER BY version DESC LIMIT 1")
+LOAD_VERSION_SQL = "SELECT data FROM presets WHERE game = ? AND kind = ? AND name = ? AND version = ?"
+SEARCH_SQL = ("SELECT name, MAX(version) FROM presets WHERE game = ? AND kind = ? AND name LIKE ? ESCAPE '\\' "
+              "GROUP BY name ORDER BY name")
+EXPORT_SQL = ("SELECT game, kind, name, MAX(version), data FROM presets "
+              "GROUP BY game, kind, name ORDER BY game, kind, name")
+
+_local = threading.local()
+
+def get_connection():
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        connection = sqlite3.connect(PRESET_DB_FILE, timeout=PRESET_DB_TIMEOUT)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with connection:
+            connection.executescript(SCHEMA_SQL)
+        _local.connection = connection
+        migrate_legacy_configs(connection)
+    return connection
+
+@contextmanager
+def write_transaction(connection):
+    connection.execute("BEGIN IMMEDIATE")
+    with connection:
+        yield connection
+
+def add_presets(connection, presets):
+    now = time.time()
+    for game_name, kind, name, data in presets:
+        version = connection.execute(LATEST_VERSION_SQL, (game_name, kind, name)).fetchone()[0] + 1
+        connection.execute(INSERT_SQL, (game_name, kind, name, version, json.dumps(data), now))
+
+def insert_presets(connection, presets):
+    with write_transaction(connection):
+        add_presets(connection, presets)
+
+def save_preset(game_name, kind, data, name=DEFAULT_PRESET_NAME):
+    insert_presets(get_connection(), [(game_name, kind, name, data)])
+
+def load_preset(game_name, kind, name=DEFAULT_PRESET_NAME, version=None):
+    if version is None:
+        row = get_connection().execute(LOAD_LATEST_SQL, (game_name, kind, name)).fetchone()
+    else:
+        row = get_connection().execute(LOAD_VERSION_SQL, (game_name, kind, name, version)).fetchone()
+    return json.loads(row[0]) if row else None
+
+def search_presets(game_name, kind, text=""):
+    pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return get_connection().execute(SEARCH_SQL, (game_name, kind, pattern)).fetchall()
+
+def delete_presets(name=None):
+    with get_connection() as connection:
+        if name is None:
+            return connection.execute("DELETE FROM presets").rowcount
+        return connection.execute("DELETE FROM presets WHERE name = ?", (name,)).rowcount
+
+def get_preset_kind(data):
+    if "options" in data:
+        return "options"
+    if isinstance(data.get("values"), dict):
+        return "weapon_exp"
+    return "cyber_elf"
+
+def get_legacy_preset_name(file_path):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    for prefix in LEGACY_FILE_PREFIXES:
+        if stem.startswith(prefix):
+            return DEFAULT_PRESET_NAME
+    return stem
+
+def read_preset_files(file_paths):
+    presets = []
+    for file_path in file_paths:
+        try:
+            with open(file_path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Skipping preset file {file_path}: {e}")
+            continue
+        if not isinstance(data, dict) or not data.get("game"):
+            print(f"Skipping preset file {file_path}: no game set")
+            continue
+        name = data.pop("name", None) or get_legacy_preset_name(file_path)
+        data.pop("version", None)
+        presets.append((data["game"], get_preset_kind(data), name, data))
+    return presets
+
+def import_presets(directory):
+    presets = read_preset_files(sorted(glob.glob(os.path.join(directory, "*.json"))))
+    insert_presets(get_connection(), presets)
+    return len(presets)
+
+def export_presets(directory):
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for game_name, kind, name, version, data in get_connection().execute(EXPORT_SQL):
+        data = json.loads(data)
+        data["name"] = name
+        data["version"] = version
+        file_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{kind}_{game_name.replace(' ', '')}_{name}") + ".json"
+        with open(os.path.join(directory, file_name), 'w') as f:
+            json.dump(data, f, indent=2)
+        count += 1
+    return count
+
+def migrate_legacy_configs(connection):
+    with write_transaction(connection):
+        if connection.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+            return
+        file_paths = sorted(
+            file_path for prefix in LEGACY_FILE_PREFIXES
+            for file_path in glob.glob(os.path.join(LEGACY_CONFIG_DIR, f"{prefix}*.json"))
+        )
+        add_presets(connection, read_preset_files(file_paths))
+        connection.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('legacy_imported', '1')")
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import cli
+import file_copy
+import game_tables
+import patch_conflicts
+import patch_plan
+import rom_builder
+from rom_info import EXPECTED_MD5, get_rom_validation_error
+
+WEAPON_EXP_RANDOM_MAX = 2000
+WEAPON_UPGRADE_RANDOM_MAX = 255
+CYBER_ELF_RANDOM_MAX = 4000
+CYBER_ELF_MODES = ("randomize", "shuffle", "none")
+
+def mix64(values):
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def random_uniform(base_seed, variant_indices, draw_index):
+    with np.errstate(over='ignore'):
+        state = mix64(np.uint64(base_seed & 0xFFFFFFFFFFFFFFFF) + np.uint64(0x9E3779B97F4A7C15) * np.uint64(draw_index + 1))
+        state = mix64(state ^ variant_indices.astype(np.uint64))
+    return (state >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+def random_integers(base_seed, variant_indices, draw_index, low, high):
+    span = np.asarray(high, dtype=np.int64) - low + 1
+    return low + np.floor(random_uniform(base_seed, variant_indices, draw_index) * span).astype(np.int64)
+
+def randomize_weapon_exp(game_name, base_seed, variant_indices):
+    tables = {}
+    draw_index = 0
+    for weapon, data in game_tables.weapon_offsets[game_name].items():
+        length = data[1]
+        max_val = WEAPON_UPGRADE_RANDOM_MAX if length == 1 else WEAPON_EXP_RANDOM_MAX
+        num_levels = max(1, length // 2)
+
+        levels = np.empty((len(variant_indices), num_levels), dtype=np.int64)
+        levels[:, 0] = random_integers(base_seed, variant_indices, draw_index, 1, max(1, max_val // (num_levels + 1)))
+        draw_index += 1
+        for level in range(1, num_levels):
+            high = np.maximum(1, (max_val - levels[:, level - 1]) // num_levels)
+            increment = random_integers(base_seed, variant_indices, draw_index, 1, high)
+            levels[:, level] = np.minimum(max_val, levels[:, level - 1] + increment)
+            draw_index += 1
+        tables[weapon] = levels
+    return tables
+
+def randomize_cyber_elf_costs(original_values, base_seed, variant_indices, mode):
+    num_entries = len(original_values)
+    draws = np.stack([
+        random_uniform(base_seed, variant_indices, 1000 + entry) for entry in range(num_entries)
+    ], axis=1)
+
+    if mode == "shuffle":
+        return np.asarray(original_values, dtype=np.int64)[np.argsort(draws, axis=1, kind='stable')]
+    return 1 + np.floor(draws * CYBER_ELF_RANDOM_MAX).astype(np.int64)
+
+def write_variant(base_path, output_path, game_name, weapon_exp_values, cyber_elf_values):
+    copy_method = file_copy.copy_file(base_path, output_path, preserve_metadata=False)
+    if weapon_exp_values:
+        game_tables.write_weapon_exp_values(output_path, game_name, weapon_exp_values)
+    if cyber_elf_values:
+        game_tables.write_cyber_elf_cost_values(output_path, game_name, cyber_elf_values)
+    return copy_method
+
+def generate_variants(rom_path, config_path, output_dir, base_seed, count, randomize_weapons=True,
+                      cyber_elf_mode="randomize", max_workers=None):
+    config = cli.load_json(config_path)
+    game_name = config.get("game")
+    if game_name not in EXPECTED_MD5:
+        raise ValueError(f"Unknown game in patch config: {game_name}")
+
+    patch_list = patch_plan.get_patch_list(game_name, config.get("options", {}))
+    conflicts = patch_conflicts.find_conflicts(game_name, patch_list, randomize_weapons, cyber_elf_mode != "none")
+    if conflicts:
+        raise ValueError("Conflicting patch selection:\n" + patch_conflicts.format_conflicts(conflicts))
+
+    error = get_rom_validation_error(rom_path, game_name)
+    if error:
+        raise ValueError(error)
+
+    variant_indices = np.arange(count, dtype=np.uint64)
+
+    weapon_tables = {}
+    if randomize_weapons and game_name in game_tables.weapon_offsets:
+        weapon_tables = randomize_weapon_exp(game_name, base_seed, variant_indices)
+
+    cyber_elf_entries = game_tables.read_cyber_elf_cost_values(rom_path, game_name)
+    cyber_elf_table = None
+    if cyber_elf_mode != "none" and cyber_elf_entries:
+        cyber_elf_table = randomize_cyber_elf_costs([val for _, val in cyber_elf_entries], base_seed,
+                                                    variant_indices, cyber_elf_mode)
+
+    os.makedirs(output_dir, exist_ok=True)
+    rom_stem = os.path.splitext(os.path.basename(rom_path))[0]
+    variants = []
+
+    with tempfile.TemporaryDirectory(dir=output_dir) as temp_dir:
+        base_path = os.path.join(temp_dir, "base.gba")
+        rom_builder.build_rom(rom_path, base_path, game_name, EXPECTED_MD5[game_name], patch_list)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = []
+            for variant in range(count):
+                weapon_exp_values = {weapon: table[variant].tolist() for weapon, table in weapon_tables.items()}
+                cyber_elf_values = None
+                if cyber_elf_table is not None:
+                    cyber_elf_values = [
+                        (index, val) for (index, _), val in zip(cyber_elf_entries, cyber_elf_table[variant].tolist())
+                    ]
+
+                output_path = os.path.join(output_dir, f"{rom_stem}_{base_seed}_{variant:05d}.gba")
+                futures.append(pool.submit(write_variant, base_path, output_path, game_name,
+                                           weapon_exp_values, cyber_elf_values))
+                variants.append({
+                    "index": variant,
+                    "seed": [base_seed, variant],
+                    "output": os.path.basename(output_path),
+                    "weapon_exp": weapon_exp_values or None,
+                    "cyber_elf": [val for _, val in cyber_elf_values] if cyber_elf_values else None
+                })
+
+            base_size = os.path.getsize(base_path)
+            for future in futures:
+                file_copy.record_copy(future.result(), base_size)
+
+    manifest = {
+        "game": game_name,
+        "base_seed": base_seed,
+        "count": count,
+        "options": config.get("options", {}),
+        "cyber_elf_mode": cyber_elf_mode,
+        "variants": variants
+    }
+    with open(os.path.join(output_dir, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate seeded randomized Mega Man Zero ROM variants")
+    parser.add_argument("--rom", required=True, help="Source ROM file")
+    parser.add_argument("--config", required=True, help="Patch config JSON (as written by Export Config)")
+    parser.add_argument("--output-dir", required=True, help="Folder for the variants and manifest.json")
+    parser.add_argument("--seed", type=int, required=True, help="Base seed")
+    parser.add_argument("--count", type=int, required=True, help="Number of variants")
+    parser.add_argument("--no-weapon-exp", action="store_true", help="Keep the weapon EXP table unchanged")
+    parser.add_argument("--cyber-elf-mode", choices=CYBER_ELF_MODES, default="randomize")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of worker processes")
+    args = parser.parse_args(argv)
+
+    rom_path = os.path.abspath(args.rom)
+    config_path = os.path.abspath(args.config)
+    output_dir = os.path.abspath(args.output_dir)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    try:
+        manifest = generate_variants(rom_path, config_path, output_dir, args.seed, args.count,
+                                     not args.no_weapon_exp, args.cyber_elf_mode, args.jobs)
+    except Exception as e:
+        print(f"Failed: {e}", file=sys.stderr)
+        return 1
+
+    copy_stats = file_copy.get_copy_stats()
+    print(f"Wrote {manifest['count']} variants to {output_dir} "
+          f"({copy_stats['avoided'] / (1024 * 1024):.0f} MiB shared by reflink, "
+          f"{(copy_stats['kernel_copied'] + copy_stats['buffered']) / (1024 * 1024):.0f} MiB copied)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import os
+
+import atomic_file
+import build_trace
+import ips_patch_applier
+import output_cache
+import output_manifest
+import game_tables
+import patch_conflicts
+import patch_plan
+import size_units
+import undo_journal
+
+MEMORY_CAP_ENV = "MMZ_PATCHER_MEMORY_CAP"
+STREAM_OVERHEAD = 64 * 1024
+MIN_STREAM_CHUNK_SIZE = 4096
+MIN_MEMORY_CAP = 192 * 1024
+
+def patch_stage(patch_list):
+    def run(rom, progress):
+        with build_trace.span("Loading patch plan", patches=len(patch_list)) as span_args:
+            index = patch_plan.load_patch_plan(patch_list, progress)
+            span_args["records"] = len(index)
+        ips_patch_applier.apply_patch_index(rom, index, progress)
+    return "Applying patches", run
+
+def weapon_exp_stage(game_name, weapon_exp_values):
+    def run(rom, progress):
+        game_tables.apply_weapon_exp_values(rom, game_name, weapon_exp_values)
+    return "Writing weapon EXP", run
+
+def cyber_elf_stage(game_name, cyber_elf_values):
+    def run(rom, progress):
+        game_tables.apply_cyber_elf_cost_values(rom, game_name, cyber_elf_values)
+    return "Writing Cyber-Elf costs", run
+
+def get_table_stages(game_name, weapon_exp_values=None, cyber_elf_values=None):
+    stages = []
+    if weapon_exp_values:
+        stages.append(weapon_exp_stage(game_name, weapon_exp_values))
+    if cyber_elf_values:
+        stages.append(cyber_elf_stage(game_name, cyber_elf_values))
+    return stages
+
+def get_build_stages(game_name, patch_list, weapon_exp_values=None, cyber_elf_values=None):
+    return [patch_stage(patch_list)] + get_table_stages(game_name, weapon_exp_values, cyber_elf_values)
+
+def run_stages(rom, stages, progress=None):
+    for count, (stage_name, run) in enumerate(stages, 1):
+        with build_trace.span(stage_name):
+            run(rom, progress)
+        if progress:
+            progress(stage_name, count, len(stages))
+    return rom
+
+def read_traced_rom(file_path, progress=None):
+    with build_trace.span("Reading ROM") as span_args:
+        rom = ips_patch_applier.read_rom(file_path, progress)
+        span_args["bytes_read"] = len(rom)
+    return rom
+
+def parse_memory_cap(value):
+    memory_cap = size_units.parse_size(value)
+    if memory_cap < MIN_MEMORY_CAP:
+        raise ValueError(f"memory cap must be at least {size_units.format_size(MIN_MEMORY_CAP)}: {value}")
+    return memory_cap
+
+def get_memory_cap():
+    value = os.environ.get(MEMORY_CAP_ENV)
+    return parse_memory_cap(value) if value else None
+
+def get_stream_chunk_size(memory_cap):
+    return max(MIN_STREAM_CHUNK_SIZE, memory_cap - STREAM_OVERHEAD)
+
+def get_table_records(file_path, game_name, weapon_exp_values=None, cyber_elf_values=None):
+    records = []
+    if weapon_exp_values:
+        records += game_tables.get_weapon_exp_records(game_name, weapon_exp_values)
+    if cyber_elf_values:
+        records += game_tables.get_cyber_elf_cost_records(file_path, game_name, cyber_elf_values)
+    return records
+
+def stream_rom(file_path, save_path, game_name, patch_list, weapon_exp_values=None, cyber_elf_values=None,
+               memory_cap=None, progress=None, check=None):
+    chunk_size = get_stream_chunk_size(memory_cap)
+    with build_trace.span("Preparing tables") as span_args:
+        table_records = get_table_records(file_path, game_name, weapon_exp_values, cyber_elf_values)
+        span_args["records"] = len(table_records)
+    with atomic_file.atomic_path(save_path) as temp_path:
+        with build_trace.span("Loading patch plan", patches=len(patch_list)) as span_args:
+            index = patch_plan.load_patch_plan(patch_list, progress)
+            span_args["records"] = len(index)
+        with build_trace.span("Streaming patches", chunk_size=chunk_size) as span_args:
+            digest = ips_patch_applier.stream_patch_index(file_path, temp_path, index, chunk_size, progress,
+                                                          output_manifest.new_hasher(), table_records)
+            span_args["bytes_written"] = os.path.getsize(temp_path)
+        if check:
+            check(digest)
+    return digest
+
+def build_rom(file_path, save_path, game_name, source_md5, patch_list, weapon_exp_values=None, cyber_elf_values=None,
+              progress=None):
+    output_key = output_cache.get_output_key(source_md5, patch_list, weapon_exp_values, cyber_elf_values)
+    with build_trace.span("Output cache lookup") as span_args:
+        cache_hit = output_cache.fetch_output(output_key, save_path)
+        span_args["hits"] = int(cache_hit)
+
+    if not cache_hit:
+        def check(digest):
+            output_manifest.verify_output(output_key, digest, save_path)
+
+        memory_cap = get_memory_cap()
+        if memory_cap:
+            stream_rom(file_path, save_path, game_name, patch_list, weapon_exp_values, cyber_elf_values, memory_cap,
+                       progress, check)
+        else:
+            rom = read_traced_rom(file_path, progress)
+            run_stages(rom, get_build_stages(game_name, patch_list, weapon_exp_values, cyber_elf_values), progress)
+            with build_trace.span("Writing ROM", bytes_written=len(rom)):
+                ips_patch_applier.write_rom_atomic(save_path, rom, progress, output_manifest.new_hasher(), check)
+
+        with build_trace.span("Output cache store"):
+            output_cache.store_output(output_key, save_path)
+
+    sources = patch_conflicts.get_selected_sources(game_name, patch_list, bool(weapon_exp_values),
+                                                   bool(cyber_elf_values))
+    undo_journal.write_undo_journal(file_path, save_path, game_name, sources)
+
+def is_patch_output(save_path):
+    return save_path.lower().endswith(".ips")
+
+def build_ips_patch(file_path, save_path, game_name, source_md5, patch_list, weapon_exp_values=None,
+                    cyber_elf_values=None, progress=None):
+    original = read_traced_rom(file_path, progress)
+    rom = run_stages(bytearray(original), get_build_stages(game_name, patch_list, weapon_exp_values,
+                                                           cyber_elf_values), progress)
+
+    if progress:
+        progress("Creating patch", 0, 1)
+    with build_trace.span("Creating patch") as span_args:
+        patch_data = ips_patch_applier.create_ips_patch(original, rom)
+        span_args["bytes_written"] = len(patch_data)
+    output_key = output_cache.get_output_key(source_md5, patch_list, weapon_exp_values, cyber_elf_values)
+    patch_key = f"{output_key}.ips-v{ips_patch_applier.IPS_WRITER_VERSION}"
+
+    def check(digest):
+        output_manifest.verify_output(patch_key, digest, save_path)
+
+    ips_patch_applier.write_rom_atomic(save_path, patch_data, hasher=output_manifest.new_hasher(), check=check)
+    if progress:
+        progress("Creating patch", 1, 1)
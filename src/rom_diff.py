@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+import patch_conflicts
+from rom_info import EXPECTED_MD5, read_gba_rom_header
+from rom_scanner import GAMES_BY_HEADER
+
+UNKNOWN_OWNER = "unknown"
+
+def map_rom_array(file_path):
+    if os.path.getsize(file_path) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(file_path, dtype=np.uint8, mode='r')
+
+def find_diff_ranges(original, modified):
+    common_length = min(len(original), len(modified))
+    changed = np.not_equal(original[:common_length], modified[:common_length]).view(np.int8)
+    edges = np.diff(changed, prepend=np.int8(0), append=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    ranges = list(zip(starts.tolist(), ends.tolist()))
+    if len(original) != len(modified):
+        ranges.append((common_length, max(len(original), len(modified))))
+    return ranges
+
+def get_owner_index(game_name):
+    if game_name not in EXPECTED_MD5:
+        return None
+    return patch_conflicts.IntervalIndex(
+        (start, end, source)
+        for source, ranges in patch_conflicts.get_source_ranges(game_name).items()
+        for start, end in ranges
+    )
+
+def label_range(owner_index, start, end):
+    if owner_index is None:
+        return [UNKNOWN_OWNER]
+
+    owners = []
+    covered = []
+    for owner_start, owner_end, source in owner_index.query(start, end):
+        if source not in owners:
+            owners.append(source)
+        covered.append((max(start, owner_start), min(end, owner_end)))
+
+    covered_length = sum(span_end - span_start for span_start, span_end in patch_conflicts.coalesce_ranges(covered))
+    if covered_length < end - start:
+        owners.append(UNKNOWN_OWNER)
+    return owners
+
+def diff_roms(original_path, modified_path, game_name=None):
+    original = map_rom_array(original_path)
+    modified = map_rom_array(modified_path)
+    if game_name is None:
+        game_name = GAMES_BY_HEADER.get(read_gba_rom_header(original_path))
+
+    owner_index = get_owner_index(game_name)
+    ranges = [
+        {"start": start, "end": end, "length": end - start, "owners": label_range(owner_index, start, end)}
+        for start, end in find_diff_ranges(original, modified)
+    ]
+    return {
+        "original": original_path,
+        "modified": modified_path,
+        "game": game_name,
+        "original_size": len(original),
+        "modified_size": len(modified),
+        "changed_bytes": sum(entry["length"] for entry in ranges),
+        "ranges": ranges
+    }
+
+def summarize_owners(report):
+    totals = {}
+    for entry in report["ranges"]:
+        for owner in entry["owners"]:
+            totals[owner] = totals.get(owner, 0) + entry["length"]
+    return totals
+
+def format_report(report):
+    lines = [
+        f"{report['original']} -> {report['modified']} ({report['game'] or 'unknown game'})",
+        f"{report['changed_bytes']} bytes changed in {len(report['ranges'])} ranges",
+        ""
+    ]
+    for entry in report["ranges"]:
+        lines.append(f"0x{entry['start']:06X}-0x{entry['end'] - 1:06X} {entry['length']:>8} bytes  "
+                     + ", ".join(entry["owners"]))
+    lines.append("")
+    for owner, length in sorted(summarize_owners(report).items(), key=lambda item: -item[1]):
+        lines.append(f"{owner}: {length} bytes")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List the byte ranges that differ between two ROMs")
+    parser.add_argument("original", help="Original (or first) ROM")
+    parser.add_argument("modified", help="Patched (or second) ROM")
+    parser.add_argument("--game", choices=list(EXPECTED_MD5), help="Game to label ranges for (default: from header)")
+    parser.add_argument("--json", action="store_true", help="Write the report as JSON")
+    parser.add_argument("--output", help="Write the report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    original_path = os.path.abspath(args.original)
+    modified_path = os.path.abspath(args.modified)
+    output_path = os.path.abspath(args.output) if args.output else None
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    try:
+        report = diff_roms(original_path, modified_path, args.game)
+    except Exception as e:
+        print(f"Failed: {e}", file=sys.stderr)
+        return 1
+
+    text = json.dumps(report, indent=2) if args.json else format_report(report)
+    if output_path:
+        with open(output_path, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
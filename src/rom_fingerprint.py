@@ -0,0 +1,54 @@
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+FINGERPRINT_BLOCK_SIZE = 1024 * 1024
+FINGERPRINT_DIGEST_SIZE = 32
+
+def map_file(f):
+    if os.fstat(f.fileno()).st_size == 0:
+        return b""
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def hash_block(data, index):
+    return hashlib.blake2b(data, digest_size=FINGERPRINT_DIGEST_SIZE, key=index.to_bytes(8, 'little')).digest()
+
+def fingerprint_buffer(data, block_size=FINGERPRINT_BLOCK_SIZE, max_workers=None):
+    view = memoryview(data)
+    blocks = [view[start:start + block_size] for start in range(0, len(view), block_size)]
+    try:
+        if len(blocks) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+                block_digests = list(pool.map(hash_block, blocks, range(len(blocks))))
+        else:
+            block_digests = [hash_block(block, index) for index, block in enumerate(blocks)]
+    finally:
+        for block in blocks:
+            block.release()
+        view.release()
+
+    root = hashlib.blake2b(digest_size=FINGERPRINT_DIGEST_SIZE, last_node=True)
+    root.update(len(data).to_bytes(8, 'little'))
+    root.update(block_size.to_bytes(8, 'little'))
+    for block_digest in block_digests:
+        root.update(block_digest)
+    return root.hexdigest()
+
+def calculate_fingerprint(file_path, block_size=FINGERPRINT_BLOCK_SIZE, max_workers=None):
+    with open(file_path, "rb") as f:
+        data = map_file(f)
+        try:
+            return fingerprint_buffer(data, block_size, max_workers)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+def calculate_md5(file_path):
+    with open(file_path, "rb") as f:
+        data = map_file(f)
+        try:
+            return hashlib.md5(data).hexdigest()
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
@@ -0,0 +1,59 @@
+import os
+
+import build_trace
+from rom_fingerprint import calculate_md5
+
+EXPECTED_MD5 = {
+    'Zero 1': 'b24a17d080a01a404cbf018ba42b9803',
+    'Zero 2': '182363b0698322e1864ced6e9eed7ead',
+    'Zero 3': 'aa1d5eeffcd5e4577db9ee6d9b1100f9',
+    'Zero 4': '0d1e88bdb09ff68adf9877a121325f9c'
+}
+
+EXPECTED_SIZE = {
+    'Zero 1': 8388608,
+    'Zero 2': 8388608,
+    'Zero 3': 8388608,
+    'Zero 4': 16777216
+}
+
+ROM_HEADER_SIGNATURES = {
+    'Zero 1': b'MEGAMAN ZEROAZCE08',
+    'Zero 2': b'MEGAMANZERO2A62E08',
+    'Zero 3': b'MEGAMANZERO3BZ3E08',
+    'Zero 4': b'MEGAMANZERO4B4ZE08'
+}
+
+ROM_HEADER_START = 0xA0
+ROM_HEADER_END = 0xB2
+
+def read_gba_rom_header(file_path):
+    try:
+        with open(file_path, 'rb') as f:
+            f.seek(ROM_HEADER_START)
+            return f.read(ROM_HEADER_END - ROM_HEADER_START)
+    except Exception as e:
+        print(f"Failed to read ROM header: {e}")
+        return None
+
+def get_rom_validation_error(file_path, game_name):
+    file_size = os.path.getsize(file_path)
+    expected_size = EXPECTED_SIZE.get(game_name)
+
+    if file_size != expected_size:
+        return f"Invalid file size for {game_name}. Expected size: {expected_size} bytes."
+
+    rom_header = read_gba_rom_header(file_path)
+    expected_rom_header = ROM_HEADER_SIGNATURES.get(game_name)
+
+    if rom_header != expected_rom_header:
+        return f"Invalid header for {game_name}. Expected header: {expected_rom_header}."
+
+    with build_trace.span("Hashing ROM", bytes_read=file_size):
+        md5_hash = calculate_md5(file_path)
+    expected_md5 = EXPECTED_MD5.get(game_name)
+
+    if md5_hash != expected_md5:
+        return f"Invalid MD5 for {game_name}. Expected MD5 hash of: {expected_md5}."
+
+    return None
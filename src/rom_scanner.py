@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import atomic_file
+import rom_fingerprint
+from rom_info import EXPECTED_MD5, EXPECTED_SIZE, ROM_HEADER_SIGNATURES, calculate_md5, read_gba_rom_header
+
+ROM_INDEX_FILE = "rom_index.json"
+ROM_INDEX_VERSION = 2
+ROM_SIZES = set(EXPECTED_SIZE.values())
+GAMES_BY_HEADER = {header: game_name for game_name, header in ROM_HEADER_SIGNATURES.items()}
+
+_index_lock = threading.Lock()
+
+def load_rom_index():
+    if os.path.exists(ROM_INDEX_FILE):
+        try:
+            with open(ROM_INDEX_FILE, 'r') as f:
+                index = json.load(f)
+            if index.get("version") == ROM_INDEX_VERSION:
+                return index
+        except Exception as e:
+            print(f"Failed to load ROM index: {e}")
+    return {"version": ROM_INDEX_VERSION, "files": {}, "fingerprints": {}}
+
+def save_rom_index(index):
+    try:
+        with atomic_file.atomic_write(ROM_INDEX_FILE, 'w') as f:
+            json.dump(index, f, indent=2)
+    except Exception as e:
+        print(f"Failed to save ROM index: {e}")
+
+def get_file_key(stat):
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+def list_rom_files(folder):
+    for dir_path, dir_names, file_names in os.walk(folder):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith(".gba"):
+                yield os.path.join(dir_path, file_name)
+
+def match_rom_header(file_path, file_size):
+    game_name = GAMES_BY_HEADER.get(read_gba_rom_header(file_path))
+    if game_name is None or EXPECTED_SIZE[game_name] != file_size:
+        return None
+    return game_name
+
+def fingerprint_rom(file_path):
+    try:
+        return rom_fingerprint.calculate_fingerprint(file_path)
+    except OSError as e:
+        print(f"Failed to fingerprint {file_path}: {e}")
+        return None
+
+def verify_rom(file_path, game_name):
+    try:
+        if calculate_md5(file_path) == EXPECTED_MD5[game_name]:
+            return game_name
+    except OSError as e:
+        print(f"Failed to hash {file_path}: {e}")
+    return None
+
+def update_index_entries(index, file_paths, max_workers=None):
+    files = index["files"]
+    fingerprints = index["fingerprints"]
+    to_fingerprint = []
+
+    for file_path in file_paths:
+        file_path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            files.pop(file_path, None)
+            continue
+
+        if stat.st_size not in ROM_SIZES:
+            files.pop(file_path, None)
+            continue
+
+        file_key = get_file_key(stat)
+        cached = files.get(file_path)
+        if cached and cached["key"] == file_key:
+            continue
+
+        game_name = match_rom_header(file_path, stat.st_size)
+        if game_name is None:
+            files[file_path] = {"key": file_key, "fingerprint": None, "game": None}
+        else:
+            to_fingerprint.append((file_path, file_key, game_name))
+
+    if not to_fingerprint:
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(lambda item: fingerprint_rom(item[0]), to_fingerprint))
+
+        to_verify = []
+        for (file_path, file_key, game_name), fingerprint in zip(to_fingerprint, results):
+            if fingerprint in fingerprints:
+                files[file_path] = {"key": file_key, "fingerprint": fingerprint, "game": fingerprints[fingerprint]}
+            else:
+                to_verify.append((file_path, file_key, game_name, fingerprint))
+
+        results = pool.map(lambda item: verify_rom(item[0], item[2]), to_verify)
+        for (file_path, file_key, _, fingerprint), game_name in zip(to_verify, results):
+            files[file_path] = {"key": file_key, "fingerprint": fingerprint, "game": game_name}
+            if fingerprint:
+                fingerprints[fingerprint] = game_name
+
+def get_folder_prefix(folder):
+    return os.path.join(os.path.abspath(folder), "")
+
+def get_valid_rom_paths(index, folder):
+    folder_prefix = get_folder_prefix(folder)
+    valid_rom_paths = {}
+    for file_path in sorted(index["files"]):
+        game_name = index["files"][file_path]["game"]
+        if file_path.startswith(folder_prefix) and game_name and game_name not in valid_rom_paths:
+            valid_rom_paths[game_name] = file_path
+    return valid_rom_paths
+
+def scan_rom_folder(folder, max_workers=None):
+    with _index_lock:
+        index = load_rom_index()
+        file_paths = [os.path.abspath(file_path) for file_path in list_rom_files(folder)]
+        update_index_entries(index, file_paths, max_workers)
+
+        seen_paths = set(file_paths)
+        folder_prefix = get_folder_prefix(folder)
+        for file_path in list(index["files"]):
+            if file_path.startswith(folder_prefix) and file_path not in seen_paths:
+                del index["files"][file_path]
+
+        save_rom_index(index)
+        return get_valid_rom_paths(index, folder)
+
+def rescan_rom_files(folder, file_paths, max_workers=None):
+    with _index_lock:
+        index = load_rom_index()
+        update_index_entries(index, [path for path in file_paths if path.lower().endswith(".gba")], max_workers)
+        save_rom_index(index)
+        return get_valid_rom_paths(index, folder)
@@ -0,0 +1,158 @@
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+
+import file_copy
+
+STRUCT_CODES = {1: 'B', 2: 'H', 4: 'I'}
+BYTE_ORDERS = {'little': '<', 'big': '>'}
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_MAGIC = b"MMZJ"
+JOURNAL_HEADER = struct.Struct('<4sI')
+JOURNAL_ENTRY = struct.Struct('<II')
+
+class TableSchema:
+    def __init__(self, name, offset, count, width=2, byteorder='little', min_value=1, max_value=None,
+                 monotonic=False, allow_zero_sentinel=False):
+        self.name = name
+        self.offset = offset
+        self.count = count
+        self.width = width
+        self.min_value = min_value
+        self.max_value = (1 << (width * 8)) - 1 if max_value is None else max_value
+        self.monotonic = monotonic
+        self.allow_zero_sentinel = allow_zero_sentinel
+        self.format = struct.Struct(f"{BYTE_ORDERS[byteorder]}{count}{STRUCT_CODES[width]}")
+
+    @property
+    def size(self):
+        return self.format.size
+
+    @property
+    def end(self):
+        return self.offset + self.size
+
+    def check_value(self, val, label=None):
+        if not (self.min_value <= val <= self.max_value):
+            raise ValueError(f"Value {val} for {label or self.name} must be between {self.min_value} and "
+                             f"{self.max_value}.")
+
+    def validate(self, values):
+        if len(values) != self.count:
+            raise ValueError(f"{self.name} needs {self.count} values, got {len(values)}.")
+
+        for val in values:
+            if self.allow_zero_sentinel and val == 0:
+                continue
+            self.check_value(val)
+
+        if self.monotonic:
+            for i in range(1, len(values)):
+                if values[i] < values[i - 1]:
+                    raise ValueError(f"{self.name} must not decrease (level {i + 1} < level {i}).")
+
+class TableView:
+    def __init__(self, buffer, schema):
+        self.buffer = buffer
+        self.schema = schema
+
+    def get(self):
+        return list(self.schema.format.unpack_from(self.buffer, self.schema.offset))
+
+    def set(self, values):
+        self.schema.validate(values)
+        self.schema.format.pack_into(self.buffer, self.schema.offset, *values)
+
+def get_journal_path(rom_path):
+    return rom_path + JOURNAL_SUFFIX
+
+def write_journal(journal_path, undo):
+    data = [JOURNAL_HEADER.pack(JOURNAL_MAGIC, len(undo))]
+    for offset, prior in undo:
+        data.append(JOURNAL_ENTRY.pack(offset, len(prior)))
+        data.append(prior)
+    with open(journal_path, 'wb') as f:
+        f.write(b"".join(data))
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_journal(journal_path):
+    with open(journal_path, 'rb') as f:
+        data = f.read()
+
+    magic, count = JOURNAL_HEADER.unpack_from(data, 0)
+    if magic != JOURNAL_MAGIC:
+        raise ValueError("Invalid table journal")
+
+    undo = []
+    pos = JOURNAL_HEADER.size
+    for _ in range(count):
+        offset, size = JOURNAL_ENTRY.unpack_from(data, pos)
+        pos += JOURNAL_ENTRY.size
+        if pos + size > len(data):
+            raise ValueError("Truncated table journal")
+        undo.append((offset, data[pos:pos + size]))
+        pos += size
+    return undo
+
+def recover_rom(rom_path):
+    journal_path = get_journal_path(rom_path)
+    if not os.path.exists(journal_path):
+        return False
+
+    try:
+        undo = read_journal(journal_path)
+    except (ValueError, struct.error) as e:
+        print(f"Discarding incomplete table journal {journal_path}: {e}")
+        undo = []
+
+    with open(rom_path, 'r+b') as f:
+        for offset, prior in undo:
+            f.seek(offset)
+            f.write(prior)
+        f.flush()
+        os.fsync(f.fileno())
+    os.remove(journal_path)
+    return True
+
+@contextmanager
+def map_rom(rom_path, writable=False):
+    recover_rom(rom_path)
+    with open(rom_path, 'r+b' if writable else 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        try:
+            yield buffer
+        finally:
+            buffer.close()
+
+def read_tables(buffer, schemas):
+    return {name: TableView(buffer, schema).get() for name, schema in schemas.items()}
+
+def write_tables(buffer, schemas, tables):
+    for name, values in tables.items():
+        schemas[name].validate(values)
+    for name, values in tables.items():
+        TableView(buffer, schemas[name]).set(values)
+
+def commit_tables(rom_path, schemas, tables):
+    for name, values in tables.items():
+        schemas[name].validate(values)
+
+    journal_path = get_journal_path(rom_path)
+    recover_rom(rom_path)
+    file_copy.unshare_file(rom_path)
+    with map_rom(rom_path, writable=True) as rom:
+        undo = [(schemas[name].offset, rom[schemas[name].offset:schemas[name].end]) for name in tables]
+        write_journal(journal_path, undo)
+        try:
+            for name, values in tables.items():
+                schemas[name].format.pack_into(rom, schemas[name].offset, *values)
+            rom.flush()
+        except BaseException:
+            for offset, prior in undo:
+                rom[offset:offset + len(prior)] = prior
+            rom.flush()
+            os.remove(journal_path)
+            raise
+    os.remove(journal_path)
@@ -0,0 +1,159 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+
+import rom_scanner
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+INOTIFY_EVENT = struct.Struct('iIII')
+INOTIFY_READ_SIZE = 64 * 1024
+POLL_INTERVAL = 2.0
+STOP_CHECK_INTERVAL = 0.5
+
+class FolderWatcher(threading.Thread):
+    def __init__(self, folder):
+        super().__init__(daemon=True)
+        self.folder = os.path.abspath(folder)
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.changed_paths = set()
+        self.needs_full_scan = False
+
+    def add_changes(self, paths=(), full_scan=False):
+        with self.lock:
+            self.changed_paths.update(paths)
+            self.needs_full_scan = self.needs_full_scan or full_scan
+
+    def take_changes(self):
+        with self.lock:
+            changes = (self.needs_full_scan, self.changed_paths)
+            self.changed_paths = set()
+            self.needs_full_scan = False
+        return changes
+
+    def stop(self):
+        self.stop_event.set()
+
+class InotifyWatcher(FolderWatcher):
+    def __init__(self, folder, libc):
+        super().__init__(folder)
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        self.add_tree(self.folder)
+
+    def add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self.watches[wd] = directory
+
+    def add_tree(self, directory):
+        for dir_path, dir_names, _ in os.walk(directory):
+            self.add_watch(dir_path)
+
+    def handle_event(self, wd, mask, name):
+        directory = self.watches.get(wd)
+        if mask & IN_Q_OVERFLOW:
+            self.add_changes(full_scan=True)
+            return
+        if mask & IN_IGNORED:
+            self.watches.pop(wd, None)
+            return
+        if directory is None:
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            self.add_changes(full_scan=True)
+            return
+
+        path = os.path.join(directory, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(path)
+                self.add_changes(rom_scanner.list_rom_files(path))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.add_changes(full_scan=True)
+            return
+
+        if mask & (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE):
+            self.add_changes([path])
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                readable, _, _ = select.select([self.fd], [], [], STOP_CHECK_INTERVAL)
+                if not readable:
+                    continue
+                data = os.read(self.fd, INOTIFY_READ_SIZE)
+                pos = 0
+                while pos < len(data):
+                    wd, mask, _, name_length = INOTIFY_EVENT.unpack_from(data, pos)
+                    pos += INOTIFY_EVENT.size
+                    name = os.fsdecode(data[pos:pos + name_length].rstrip(b"\0"))
+                    pos += name_length
+                    self.handle_event(wd, mask, name)
+        finally:
+            os.close(self.fd)
+
+class PollingWatcher(FolderWatcher):
+    def __init__(self, folder, interval=POLL_INTERVAL):
+        super().__init__(folder)
+        self.interval = interval
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self):
+        snapshot = {}
+        for file_path in rom_scanner.list_rom_files(self.folder):
+            try:
+                snapshot[file_path] = rom_scanner.get_file_key(os.stat(file_path))
+            except OSError:
+                pass
+        return snapshot
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            snapshot = self.take_snapshot()
+            changed = {path for path, key in snapshot.items() if self.snapshot.get(path) != key}
+            changed.update(path for path in self.snapshot if path not in snapshot)
+            self.snapshot = snapshot
+            if changed:
+                self.add_changes(changed)
+
+def load_libc():
+    if not hasattr(os, "fsencode") or not os.path.exists("/proc/sys/fs/inotify"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+def watch_folder(folder):
+    libc = load_libc()
+    watcher = None
+    if libc is not None:
+        try:
+            watcher = InotifyWatcher(folder, libc)
+        except OSError as e:
+            print(f"Falling back to polling for {folder}: {e}")
+    if watcher is None:
+        watcher = PollingWatcher(folder)
+    watcher.start()
+    return watcher
@@ -0,0 +1,18 @@
+SIZE_SUFFIXES = {"K": 1024, "M": 1024 * 1024, "G": 1024 * 1024 * 1024}
+
+def parse_size(value):
+    text = value.strip().upper().removesuffix("IB").removesuffix("B")
+    multiplier = SIZE_SUFFIXES.get(text[-1:], 1)
+    try:
+        size = int(text[:-1] if text[-1:] in SIZE_SUFFIXES else text) * multiplier
+    except ValueError:
+        raise ValueError(f"invalid size: {value}")
+    if size <= 0:
+        raise ValueError(f"size must be positive: {value}")
+    return size
+
+def format_size(size):
+    for suffix, multiplier in reversed(SIZE_SUFFIXES.items()):
+        if size >= multiplier:
+            return f"{size / multiplier:.1f} {suffix}iB"
+    return f"{size} bytes"
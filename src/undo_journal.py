@@ -0,0 +1,159 @@
+import os
+import struct
+
+import atomic_file
+import build_trace
+import file_copy
+import ips_patch_applier
+import patch_conflicts
+
+UNDO_SUFFIX = ".undo"
+UNDO_MAGIC = b"MMZU"
+UNDO_VERSION = 2
+UNDO_HEADER = struct.Struct('<4sBxxxII')
+UNDO_SOURCE = struct.Struct('<H')
+UNDO_RECORD = struct.Struct('<IIB')
+UNDO_CHUNK_SIZE = 16 * 1024
+
+def get_undo_path(rom_path):
+    return f"{rom_path}{UNDO_SUFFIX}"
+
+def iter_range(f, offset, length):
+    f.seek(offset)
+    for pos in range(0, length, UNDO_CHUNK_SIZE):
+        part = min(UNDO_CHUNK_SIZE, length - pos)
+        data = f.read(part)
+        yield data + bytes(part - len(data)) if len(data) < part else data
+
+def write_record(journal, offset, content, rle_size):
+    if rle_size >= 0:
+        journal.write(UNDO_RECORD.pack(offset, rle_size, 1) + content)
+    else:
+        journal.write(UNDO_RECORD.pack(offset, len(content), 0) + content)
+
+def write_range_records(journal, f, start, end):
+    pending = None
+    for chunk_start, data in zip(range(start, end, UNDO_CHUNK_SIZE), iter_range(f, start, end - start)):
+        for offset, content, rle_size in ips_patch_applier.split_range_records(data, 0, len(data)):
+            offset += chunk_start
+            if pending and rle_size >= 0 and pending[2] >= 0 and pending[1] == content and \
+                    pending[0] + pending[2] == offset:
+                pending = (pending[0], content, pending[2] + rle_size)
+                continue
+            if pending:
+                write_record(journal, *pending)
+            pending = (offset, content, rle_size)
+    if pending:
+        write_record(journal, *pending)
+
+def write_undo_journal(original_path, output_path, game_name, sources):
+    source_ranges = patch_conflicts.get_source_ranges(game_name)
+    original_size = os.path.getsize(original_path)
+
+    with build_trace.span("Writing undo journal", sources=len(sources)) as span_args:
+        with open(original_path, 'rb') as original, open(output_path, 'rb') as output, \
+                atomic_file.atomic_write(get_undo_path(output_path)) as journal:
+            journal.write(UNDO_HEADER.pack(UNDO_MAGIC, UNDO_VERSION, len(sources), original_size))
+            for source in sources:
+                name = source.encode()
+                journal.write(UNDO_SOURCE.pack(len(name)) + name)
+                for start, end in source_ranges[source]:
+                    if start < original_size:
+                        write_range_records(journal, original, start, min(end, original_size))
+                    if end > original_size:
+                        start = max(start, original_size)
+                        write_record(journal, start, b"\x00", end - start)
+                journal.write(UNDO_RECORD.pack(0, 0, 0))
+                for start, end in source_ranges[source]:
+                    write_range_records(journal, output, start, end)
+                journal.write(UNDO_RECORD.pack(0, 0, 0))
+            span_args["bytes_written"] = journal.tell()
+
+def read_records(journal):
+    records = []
+    while True:
+        offset, length, rle = UNDO_RECORD.unpack(journal.read(UNDO_RECORD.size))
+        if not length:
+            return records
+        records.append((offset, length, rle, journal.tell()))
+        journal.seek(1 if rle else length, os.SEEK_CUR)
+
+def read_undo_journal(journal):
+    magic, version, count, original_size = UNDO_HEADER.unpack(journal.read(UNDO_HEADER.size))
+    if magic != UNDO_MAGIC or version != UNDO_VERSION:
+        raise ValueError(f"{journal.name} is not a valid undo journal")
+
+    entries = {}
+    for _ in range(count):
+        name_length, = UNDO_SOURCE.unpack(journal.read(UNDO_SOURCE.size))
+        source = journal.read(name_length).decode()
+        entries[source] = (read_records(journal), read_records(journal))
+    return original_size, entries
+
+def iter_record(journal, length, rle, pos):
+    if not rle:
+        yield from iter_range(journal, pos, length)
+        return
+    journal.seek(pos)
+    fill = journal.read(1)
+    for start in range(0, length, UNDO_CHUNK_SIZE):
+        yield fill * min(UNDO_CHUNK_SIZE, length - start)
+
+def records_match(rom, journal, records):
+    for offset, length, rle, pos in records:
+        rom_chunks = iter_range(rom, offset, length)
+        for expected in iter_record(journal, length, rle, pos):
+            if next(rom_chunks) != expected:
+                return False
+    return True
+
+def get_records_end(records):
+    return max((offset + length for offset, length, _, _ in records), default=0)
+
+def read_source_states(rom, journal, entries):
+    states = {}
+    for source, (before, after) in entries.items():
+        if records_match(rom, journal, after):
+            states[source] = "applied"
+        elif records_match(rom, journal, before):
+            states[source] = "reverted"
+        else:
+            states[source] = "modified"
+    return states
+
+def get_source_states(rom_path):
+    with open(get_undo_path(rom_path), 'rb') as journal, open(rom_path, 'rb') as rom:
+        _, entries = read_undo_journal(journal)
+        return read_source_states(rom, journal, entries)
+
+def find_source(entries, rom_path, source):
+    if source in entries:
+        return source
+    for name in entries:
+        if os.path.basename(name) == source:
+            return name
+    raise ValueError(f"{source} is not recorded in {get_undo_path(rom_path)}")
+
+def set_source_state(rom_path, source, applied):
+    with open(get_undo_path(rom_path), 'rb') as journal:
+        original_size, entries = read_undo_journal(journal)
+        source = find_source(entries, rom_path, source)
+
+        file_copy.unshare_file(rom_path)
+        written = 0
+        with build_trace.span("Applying patch" if applied else "Reverting patch", source=source) as span_args:
+            with open(rom_path, 'r+b') as rom:
+                for offset, length, rle, pos in entries[source][1 if applied else 0]:
+                    chunks = iter_record(journal, length, rle, pos)
+                    rom.seek(offset)
+                    for data in chunks:
+                        written += rom.write(data)
+
+                states = read_source_states(rom, journal, entries)
+                size = max([original_size] + [get_records_end(entries[name][1])
+                                              for name, state in states.items() if state == "applied"])
+                rom.truncate(size)
+                rom.flush()
+                os.fsync(rom.fileno())
+            span_args["bytes_written"] = written
+    return written
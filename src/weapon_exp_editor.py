@@ -1,82 +1,31 @@
-import os
 import tkinter as tk
 from tkinter import messagebox, filedialog
 import fractions
 import random
 import json
 
-weapon_offsets = {
-    'Zero 1': {
-        'Buster Shot': (0x2A8168, 4, ["Charged Buster", "Faster Charge"]),
-        'Z-Saber': (0x2A8184, 8, ["Second Slash", "Third Slash", "Charged Saber", "Faster Charge"]),
-        'Triple Rod': (0x2A81BE, 8, ["Second Stab", "Third Stab", "Charged Rod", "Faster Charge"]),
-        'Shield Boomerang': (0x2A81D6, 4, ["Farther Attack Range", "Farthest Attack Range"]),
-        'Buster 4 Shot Upgrade': (0x188A2, 1),
-        'Air Spin Slash': (0x18A60, 1),
-        'Dash Spin Slash': (0x18A1C, 1),
-    },
-    'Zero 2': {
-        'Buster Shot': (0x3359B4, 4, ["Charged Buster", "Faster Charge"]),
-        'Z-Saber': (0x3359C4, 8, ["Second Slash", "Third Slash", "Charged Saber", "Faster Charge"]),
-        'Chain Rod': (0x3359DA, 4, ["Charged Rod", "Faster Charge"]),
-        'Shield Boomerang': (0x3359E8, 4, ["Farther Attack Range", "Farthest Attack Range"]),
-    }
-}
-
-DEFAULT_CONFIG_DIR = "default_configs"
-os.makedirs(DEFAULT_CONFIG_DIR, exist_ok=True)
+import game_tables
+import preset_store
 
 def open_weapon_exp_editor(rom_path, game_name):
     editor = tk.Toplevel()
     editor.title(f"Modify Weapon EXP - {game_name}")
     entries = {}
     original_values = {}
+    saved_values = {}
 
     def read_values():
-        with open(rom_path, 'rb') as f:
-            for weapon, data in weapon_offsets[game_name].items():
-                offset, length = data[0], data[1]
-                f.seek(offset)
-                raw_data = f.read(length)
-                if length > 1:
-                    values = [
-                        int.from_bytes(raw_data[i:i + 2], 'little') for i in range(0, length, 2)
-                    ]
-                else:
-                    values = [raw_data[0]]
-                original_values[weapon] = values[:]
-                entries[weapon] = [tk.StringVar(value=str(val)) for val in values]
+        for weapon, values in game_tables.read_weapon_exp_values(rom_path, game_name).items():
+            original_values[weapon] = values[:]
+            entries[weapon] = [tk.StringVar(value=str(val)) for val in values]
 
-    def write_values():
+    def save_values():
         try:
-            with open(rom_path, 'r+b') as f:
-                for weapon, data in weapon_offsets[game_name].items():
-                    offset, length = data[0], data[1]
-                    f.seek(offset)
-                    values = []
-                    for var in entries[weapon]:
-                        val_str = var.get().strip()
-                        if not val_str.isdigit():
-                            raise ValueError(
-                                f"Invalid value '{val_str}' for {weapon}. Only non-negative integers are allowed.")
-                        val = int(val_str)
-                        values.append(val)
-
-                    if len(values) > 1:
-                        for i in range(1, len(values)):
-                            if values[i] < values[i - 1]:
-                                raise ValueError(
-                                    f"EXP for {weapon} must not decrease (level {i + 1} < level {i}).")
-
-                    for val in values:
-                        if length == 1:
-                            if not (1 <= val <= 255):
-                                raise ValueError(f"Value {val} for {weapon} must be between 1 and 255.")
-                            f.write(bytes([val]))
-                        elif length > 1:
-                            if not (1 <= val <= 65535):
-                                raise ValueError(f"Value {val} for {weapon} must be between 1 and 65535.")
-                            f.write(val.to_bytes(2, 'little'))
+            values = game_tables.validate_weapon_exp_values(game_name, {
+                weapon: [var.get() for var in vars_list]
+                for weapon, vars_list in entries.items()
+            })
+            saved_values.update(values)
             editor.destroy()
         except ValueError as e:
             messagebox.showerror("Invalid Input", str(e))
@@ -85,7 +34,7 @@ def open_weapon_exp_editor(rom_path, game_name):
 
     def apply_scale(factor):
         for weapon, vars_list in entries.items():
-            offset, length = weapon_offsets[game_name][weapon][0], weapon_offsets[game_name][weapon][1]
+            offset, length = game_tables.weapon_offsets[game_name][weapon][0], game_tables.weapon_offsets[game_name][weapon][1]
             max_val = 255 if len(vars_list) == 1 and length == 1 else 65535
             for i, var in enumerate(vars_list):
                 try:
@@ -102,7 +51,7 @@ def open_weapon_exp_editor(rom_path, game_name):
 
     def randomize_values():
         for weapon, vars_list in entries.items():
-            offset, length = weapon_offsets[game_name][weapon][0], weapon_offsets[game_name][weapon][1]
+            offset, length = game_tables.weapon_offsets[game_name][weapon][0], game_tables.weapon_offsets[game_name][weapon][1]
             max_val = 255 if length == 1 else 2000
             num_levels = len(vars_list)
             base = random.randint(1, max(1, max_val // (num_levels + 1)))
@@ -175,32 +124,27 @@ def open_weapon_exp_editor(rom_path, game_name):
                 for weapon, vars_list in entries.items()
             }
         }
-        path = os.path.join(DEFAULT_CONFIG_DIR, f"default_weaponexp_{game_name.replace(' ', '')}.json")
         try:
-            with open(path, 'w') as f:
-                json.dump(data, f, indent=2)
+            preset_store.save_preset(game_name, "weapon_exp", data)
             messagebox.showinfo("Saved", f"Default config saved for {game_name}.")
         except Exception as e:
             messagebox.showerror("Error", f"Could not save default config:\n{e}")
 
     read_values()
 
-    default_config_path = os.path.join(DEFAULT_CONFIG_DIR, f"default_weaponexp_{game_name.replace(' ', '')}.json")
-    if os.path.exists(default_config_path):
-        try:
-            with open(default_config_path, 'r') as f:
-                data = json.load(f)
-            if data.get("game") == game_name:
-                for weapon, values in data.get("values", {}).items():
-                    if weapon in entries:
-                        for i, val in enumerate(values):
-                            entries[weapon][i].set(val)
-        except Exception as e:
-            print(f"Failed to load default weapon EXP config for {game_name}: {e}")
+    try:
+        data = preset_store.load_preset(game_name, "weapon_exp")
+        if data and data.get("game") == game_name:
+            for weapon, values in data.get("values", {}).items():
+                if weapon in entries:
+                    for i, val in enumerate(values):
+                        entries[weapon][i].set(val)
+    except Exception as e:
+        print(f"Failed to load default weapon EXP config for {game_name}: {e}")
 
     row = 0
     for weapon, vars_list in entries.items():
-        data = weapon_offsets[game_name][weapon]
+        data = game_tables.weapon_offsets[game_name][weapon]
         labels = data[2] if len(data) == 3 else None
 
         tk.Label(editor, text=weapon).grid(row=row, column=0, sticky="w", pady=4)
@@ -239,7 +183,8 @@ def open_weapon_exp_editor(rom_path, game_name):
     tk.Button(btn_frame, text="Import Config", command=import_config).pack(side="left", padx=5)
     tk.Button(btn_frame, text="Export Config", command=export_config).pack(side="left", padx=5)
     tk.Button(btn_frame, text="Save As Default Config", command=save_as_default_config).pack(side="left", padx=5)
-    tk.Button(btn_frame, text="Save and Close", command=write_values).pack(side="left", padx=5)
+    tk.Button(btn_frame, text="Save and Close", command=save_values).pack(side="left", padx=5)
 
     editor.grab_set()
     editor.wait_window(editor)
+    return saved_values or None